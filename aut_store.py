@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+'''A compressed, content-addressed store of automata in HOA format.
+
+Each automaton is stored once in an SQLite file, compressed by zlib and
+keyed by a hash of its text. The ``name:`` and ``tool:`` header lines
+are dropped before hashing, so the same automaton produced by several
+tools (or for the same formula in several runs) is stored only once.
+'''
+import hashlib
+import math
+import sqlite3
+import zlib
+from functools import lru_cache
+
+DROPPED_HEADERS = ('name:', 'tool:')
+
+def normalize(hoa):
+    """Removes header lines that do not change the automaton."""
+    lines = hoa.strip().split('\n')
+    if '--BODY--' not in lines:
+        return '\n'.join(lines)
+    body = lines.index('--BODY--')
+    header = [l for l in lines[:body] if not l.startswith(DROPPED_HEADERS)]
+    return '\n'.join(header + lines[body:])
+
+def aut_key(hoa):
+    return hashlib.sha1(hoa.encode('utf-8')).hexdigest()
+
+class AutomatonStore(object):
+    """Store of automata in the SQLite file ``path``."""
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute('CREATE TABLE IF NOT EXISTS automata '
+                        '(hash TEXT PRIMARY KEY, data BLOB)')
+        self.get = lru_cache(maxsize=1024)(self.load)
+
+    def put_many(self, hoas):
+        """Stores automata ``hoas`` and returns the list of their keys.
+        Missing automata (``None`` or NaN) get ``None`` as key.
+        """
+        keys, rows = [], {}
+        for hoa in hoas:
+            if hoa is None or (isinstance(hoa, float) and math.isnan(hoa)):
+                keys.append(None)
+                continue
+            hoa = normalize(hoa)
+            key = aut_key(hoa)
+            keys.append(key)
+            if key not in rows:
+                rows[key] = zlib.compress(hoa.encode('utf-8'), 9)
+        with self.db:
+            self.db.executemany('INSERT OR IGNORE INTO automata VALUES (?,?)',
+                                rows.items())
+        return keys
+
+    def put(self, hoa):
+        return self.put_many([hoa])[0]
+
+    def load(self, key):
+        """Returns the HOA string stored under ``key`` (``None`` if
+        ``key`` is missing). Use ``get`` for cached access.
+        """
+        if not isinstance(key, str):
+            return None
+        row = self.db.execute('SELECT data FROM automata WHERE hash = ?',
+                              (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def __contains__(self, key):
+        return self.db.execute('SELECT 1 FROM automata WHERE hash = ?',
+                               (key,)).fetchone() is not None
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM automata').fetchone()[0]
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+'''Vectorized bootstrap over formulas.
+
+All statistics handled here are sums of per-formula contributions
+(cummulative sizes, win counts, counts of minima). A resample is thus
+a vector of weights that says how many times each formula was drawn,
+and the statistic of thousands of resamples is a single matrix product.
+'''
+import numpy as np
+import pandas as pd
+
+def resample_weights(n, k, rng):
+    """Draws ``k`` resamples of ``n`` formulas as an index matrix of shape
+    ``(k, n)`` and returns the matrix of weights of the same shape that
+    counts how many times each formula was drawn in each resample.
+    """
+    idx = rng.integers(0, n, size=(k, n))
+    idx += (np.arange(k) * n)[:, None]
+    return np.bincount(idx.ravel(), minlength=k*n).reshape(k, n)
+
+def bootstrap_sums(stats, samples=2000, alpha=0.05, seed=0, chunk=200):
+    """Computes bootstrap confidence intervals of column sums of
+    ``stats``.
+
+    Parameters
+    ----------
+    stats : array of shape ``(n, m)``
+        contributions of ``n`` formulas to ``m`` statistics
+    samples : int, default 2000
+        number of resamples
+    alpha : float, default 0.05
+        the intervals cover ``1-alpha`` of the bootstrap distribution
+    seed : int, default 0
+        seed of the random generator
+    chunk : int, default 200
+        number of resamples processed at once (bounds the memory)
+
+    Returns three arrays of shape ``(m,)``: estimate, low, and high.
+    """
+    stats = np.asarray(stats, dtype=np.float64)
+    n, m = stats.shape
+    rng = np.random.default_rng(seed)
+    totals = np.empty((samples, m))
+    for start in range(0, samples, chunk):
+        k = min(chunk, samples - start)
+        totals[start:start+k] = resample_weights(n, k, rng) @ stats
+    low, high = np.percentile(totals, [50*alpha, 100 - 50*alpha], axis=0)
+    return stats.sum(axis=0), low, high
+
+def ci_frame(estimate, low, high, index):
+    """Returns a DataFrame with columns ``estimate``, ``low``, ``high``."""
+    return pd.DataFrame({'estimate' : estimate, 'low' : low, 'high' : high},
+                        index=index, columns=['estimate', 'low', 'high'])
+
+def win_indicators(props, ok, include_fails=True):
+    """Returns a boolean array ``w`` of shape ``(n, t, t)`` where
+    ``w[f, i, j]`` says that tool ``i`` is better than tool ``j`` on
+    formula ``f`` in the sense of ``LtlcrossRunner.better_than``.
+
+    Parameters
+    ----------
+    props : list of arrays of shape ``(n, t)``
+        values of compared properties in lexicographic order
+    ok : boolean array of shape ``(n, t)``
+        ``True`` where ``exit_status`` is ``ok``
+    include_fails : Boolean, default ``True``
+        if ``True``, non-fail beats fail
+    """
+    n, t = ok.shape
+    ok_i = ok[:, :, None]
+    ok_j = ok[:, None, :]
+    if include_fails:
+        better = ok_i & ~ok_j
+        eq = ok_i & ok_j
+    else:
+        better = np.zeros((n, t, t), dtype=bool)
+        eq = np.broadcast_to(ok_i, (n, t, t))
+    for prop in props:
+        p_i = prop[:, :, None]
+        p_j = prop[:, None, :]
+        better = better | (eq & (p_i < p_j))
+        eq = eq & (p_i == p_j)
+    return better
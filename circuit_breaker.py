@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+'''Per-tool circuit breaker for parallel runs of ``LtlcrossRunner``.
+
+A tool is suspended after ``K`` consecutive jobs that failed with the
+same type of error (``K`` is configurable per error type). Jobs of a
+suspended tool are not run and get the exit status ``skipped``. If
+``retry_after`` is set, a suspended tool is probed again by its next
+job after ``retry_after`` skipped jobs: it is resumed if the probe
+succeeds and suspended again otherwise.
+'''
+import threading
+
+DEFAULT_LIMITS = {'timeout' : 3, 'crash' : 5, 'parse error' : 5,
+                  'no output' : 5, 'memout' : 3}
+
+def error_type(status):
+    """Maps ``exit_status`` to the error types of ``get_error_count``."""
+    if status in ['exit code', 'signal']:
+        return 'crash'
+    return status
+
+class CircuitBreaker(object):
+    """Decides which jobs to skip based on results of previous jobs.
+
+    Parameters
+    ----------
+    limits : a dict (String -> int), default ``DEFAULT_LIMITS``
+        number of consecutive errors of the given type that suspend
+        a tool; error types missing in the dict never suspend a tool
+    retry_after : int, default ``None``
+        number of skipped jobs after which a suspended tool is probed
+        again, ``None`` means never
+    """
+    def __init__(self, limits=None, retry_after=None):
+        self.limits = dict(DEFAULT_LIMITS) if limits is None else limits
+        self.retry_after = retry_after
+        self.counts = {}
+        self.suspended = {}
+        self.probing = set()
+        self.lock = threading.Lock()
+
+    def allow(self, tool):
+        """Returns ``True`` if the next job of ``tool`` should run."""
+        with self.lock:
+            if tool not in self.suspended:
+                return True
+            if tool not in self.probing and self.retry_after is not None \
+               and self.suspended[tool] >= self.retry_after:
+                self.probing.add(tool)
+                return True
+            self.suspended[tool] += 1
+            return False
+
+    def record(self, tool, statuses):
+        """Records ``exit_status`` values of a finished job of ``tool``.
+        Returns ``'suspended'`` or ``'resumed'`` if the state of the tool
+        changed, ``None`` otherwise.
+        """
+        errors = set(error_type(s) for s in statuses if s != 'ok')
+        with self.lock:
+            probe = tool in self.probing
+            self.probing.discard(tool)
+            counts = self.counts.setdefault(tool, {})
+            # Only consecutive errors of the same type count
+            for err in list(counts):
+                if err not in errors:
+                    del counts[err]
+            for err in errors:
+                counts[err] = counts.get(err, 0) + 1
+            if not errors:
+                if tool in self.suspended:
+                    del self.suspended[tool]
+                    return 'resumed'
+                return None
+            if probe:
+                self.suspended[tool] = 0
+                return None
+            if tool not in self.suspended and \
+               any(counts.get(e, 0) >= k for e, k in self.limits.items()):
+                self.suspended[tool] = 0
+                return 'suspended'
+            return None
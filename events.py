@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+'''Machine-readable event log of ltlcross runs.
+
+Each line of the log is a JSON object with at least ``ts`` (Unix time)
+and ``event``. The events written by ``LtlcrossRunner`` are
+
+ * ``run_start``       -- ``cmd``, ``res_file``, ``backend``
+ * ``tool_registered`` -- ``tool_id``, ``tool``, ``cmd``
+ * ``formula_started`` -- ``form_id``, ``formula``
+ * ``tool_finished``   -- ``formula``, ``tool``, ``exit_status``,
+   ``exit_code``, and in parallel runs also ``time`` and sizes
+   (``states``, ``edges``, ...)
+ * ``tool_stats``      -- the same as ``tool_finished`` with ``time`` and
+   sizes, emitted at the end of runs of a single ltlcross process
+ * ``check_error``     -- ``form_id``, ``formula``, ``error``, ``tool_ids``
+   (failed sanity checks such as ``P0*N1 is nonempty``; failures of
+   tools are reported by ``tool_finished`` only)
+ * ``tool_suspended``, ``tool_resumed`` -- ``tool``, ``form_id`` (changes
+   of a circuit breaker in parallel runs)
+ * ``run_end``         -- ``returncode``, ``duration``
+
+The log is append-only, so it can be read while the run is in progress.
+A single ltlcross process writes its statistics only at the end of the
+run, so its ``tool_finished`` events are parsed from its log as the
+translations finish and the statistics follow in ``tool_stats``.
+'''
+import json
+import math
+import re
+import threading
+import time
+import pandas as pd
+from tool_wrapper import memout_status
+
+SIZES = ['states', 'edges', 'transitions', 'acc', 'scc', 'nondet_states']
+
+def clean(value):
+    """Converts ``value`` to a JSON-friendly type (NaN to ``None``)."""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+class EventLog(object):
+    """Appends events to the file ``path``. Safe to use from threads."""
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a')
+        self.lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        record = {'ts' : time.time(), 'event' : event}
+        record.update({k : clean(v) for k, v in fields.items()})
+        line = json.dumps(record)
+        with self.lock:
+            print(line, file=self.file, flush=True)
+
+    def emit_results(self, res, event='tool_finished'):
+        """Emits ``event`` for each row of the ltlcross results ``res``
+        (a DataFrame).
+        """
+        for row in res.to_dict('records'):
+            status = memout_status(row.get('exit_status'),
+                                   row.get('exit_code'))
+            fields = {c : row[c] for c in ['exit_code', 'time'] + SIZES
+                      if c in row}
+            self.emit(event, formula=row['formula'],
+                      tool=row['tool'], exit_status=status, **fields)
+
+    def close(self):
+        self.file.close()
+
+class LogLineParser(object):
+    """Turns lines of ltlcross's log into events as they come.
+
+    Parameters
+    ----------
+    events : EventLog
+    tools : list of Strings, default ``None``
+        names of tools in the order of their ids (``P0``, ``P1``, ...);
+        if given, ``tool_finished`` is emitted for each translation
+    """
+    formula = re.compile(r'.*ltl:(\d+): (.*)$')
+    problem = re.compile(r'error: .* is nonempty')
+    tool = re.compile(r'[PN]\d+')
+    running = re.compile(r'Running \[([PN])(\d+)\]')
+    gather = re.compile(r'Performing sanity checks and gathering statistics')
+    exit_code = re.compile(r'exit code (-?\d+)')
+    failures = [('timeout during execution', 'timeout'),
+                ('returned exit code', 'exit code'),
+                ('terminated by signal', 'signal'),
+                ('failed to parse', 'parse error'),
+                ('no output', 'no output')]
+
+    def __init__(self, events, tools=None):
+        self.events = events
+        self.tools = tools
+        self.form_id = None
+        self.form = None
+        self.pending = None
+        self.checking = False
+
+    def finish(self):
+        """Emits ``tool_finished`` for the last started translation."""
+        if self.pending is None:
+            return
+        formula, tool, status, code = self.pending
+        self.pending = None
+        self.events.emit('tool_finished', formula=formula, tool=tool,
+                         exit_status=memout_status(status, code),
+                         exit_code=code)
+
+    def feed(self, line):
+        m_form = self.formula.match(line)
+        if m_form:
+            self.finish()
+            self.checking = False
+            self.form_id = int(m_form.group(1)) - 1
+            self.form = m_form.group(2)
+            self.events.emit('formula_started', form_id=self.form_id,
+                             formula=self.form)
+        m_run = self.running.match(line.strip())
+        if m_run and self.tools is not None:
+            self.finish()
+            formula = self.form if m_run.group(1) == 'P' \
+                      else '!({})'.format(self.form)
+            self.pending = [formula, self.tools[int(m_run.group(2))],
+                            'ok', 0]
+        if self.gather.match(line):
+            self.checking = True
+        if self.checking or not line.strip():
+            self.finish()
+        if self.pending is not None and not m_run:
+            for text, status in self.failures:
+                if text in line:
+                    self.pending[2] = status
+                    m_code = self.exit_code.search(line)
+                    self.pending[3] = int(m_code.group(1)) if m_code \
+                                      else None
+                    break
+        # Only errors of sanity checks, failures of tools are in
+        # ``tool_finished`` already
+        m_prob = self.problem.match(line.strip())
+        if m_prob and self.checking:
+            self.events.emit('check_error', form_id=self.form_id,
+                             formula=self.form, error=m_prob.group(0),
+                             tool_ids=self.tool.findall(m_prob.group(0)))
+
+def read_events(path, event=None):
+    """Yields events from ``path``, only of type ``event`` if given.
+    A partially written last line is skipped.
+    """
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if event is None or record['event'] == event:
+                yield record
+
+def events_frame(path, event=None):
+    """Returns events from ``path`` as a DataFrame."""
+    return pd.DataFrame(list(read_events(path, event)))
+
+def progress(path):
+    """Returns a Series with the numbers of started formulas, finished
+    translations, failed translations, and check errors so far.
+    """
+    counts = {'formula_started' : 0, 'tool_finished' : 0,
+              'failed' : 0, 'check_error' : 0}
+    for record in read_events(path):
+        if record['event'] in counts:
+            counts[record['event']] += 1
+        if record['event'] == 'tool_finished' and \
+           record.get('exit_status') != 'ok':
+            counts['failed'] += 1
+    return pd.Series(counts)
+
+def failures(path):
+    """Returns a DataFrame of translations that did not finish ``ok``."""
+    res = events_frame(path, 'tool_finished')
+    if res.empty:
+        return res
+    return res[res.exit_status != 'ok']
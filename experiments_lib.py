@@ -4,6 +4,7 @@ import spot
 import pandas as pd
 import subprocess
 from functools import lru_cache
+from profiling import profiled
 from spot import op_F,op_G,op_U,op_R,op_X,op_And,op_Or,op_tt,op_ff
 
 def pretty_print(form):
@@ -122,6 +123,7 @@ def get_states_number(command,formula):
     return ret
 
     
+@profiled
 def compute_results(formulas,toolnames,tools):
     '''Runs each tool from `toolnames` on each formula from `formulas`
     and stores the results in a pandas DataFrame, which is returned.'''
@@ -139,6 +141,7 @@ def compute_results(formulas,toolnames,tools):
 # interactive widget, we avoid some repeated calls to dot for
 # identical inputs.
 @lru_cache(maxsize=64)
+@profiled
 def dot_to_svg(str):
     """
     Send some text to dot for conversion to SVG.
@@ -156,6 +159,7 @@ def dot_to_svg(str):
         raise subprocess.CalledProcessError(ret, 'dot')
     return stdout.decode('utf-8')
 
+@profiled
 def hoa_to_dot(hoa):
     """
     Converts an HOA automaton into its DOT representation.
@@ -174,12 +178,14 @@ def hoa_to_dot(hoa):
         raise subprocess.CalledProcessError(ret, 'autfilt')
     return stdout.decode('utf-8')
 
+@profiled
 def hoa_to_spot(hoa):
     print(hoa,file=open('tmp_aut.hoa','w'))
     a = spot.automaton('tmp_aut.hoa')
     subprocess.call(['rm','tmp_aut.hoa'])
     return a
 
+@profiled
 def dot_for_vwaa(command,formula):
     """
     Adds `-o dot` to the command.
@@ -200,5 +206,6 @@ def dot_for_vwaa(command,formula):
         raise subprocess.CalledProcessError(ret, 'translator')
     return stdout.decode('utf-8')
 
+@profiled
 def get_svg(command,formula):
     return dot_to_svg(dot_for_vwaa(command,formula))
\ No newline at end of file
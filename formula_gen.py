@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+'''Parallel generation of random LTL formulas for benchmarks.
+
+Formulas are generated in batches by ``spot.randltl`` in worker
+processes. Batch ``i`` uses a seed derived from ``(seed, i)`` by
+``numpy.random.SeedSequence``, so the seed streams of batches are
+disjoint. Batches are consumed in their order, hence the output depends
+only on ``seed`` and not on the number of processes or their timing.
+
+Trivial formulas are filtered, formulas are classified to fragments, and
+their signatures are computed in the workers. The signature consists of
+the atomic propositions of the formula and of the membership of a fixed
+set of sample words in its language, so equivalent formulas have equal
+signatures. Deduplication up to equivalence is done centrally; a new
+formula is checked for equivalence only with previously accepted
+formulas of the same signature.
+'''
+import os
+import subprocess
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import spot
+
+FRAGMENTS = ['ltl3dra', 'full']
+SAMPLE_WORDS = 32
+
+def in_ltlgux(form):
+    """Runs ``ltl3dra -C`` to decide whether ``form`` is in the fragment
+    LTL(F,G,U,X) supported by LTL3DRA.
+    """
+    f = spot.formula(form)
+    res = subprocess.check_output(['ltl3dra', '-C', '-f',
+                                   f.to_str(format='spin')],
+                                  universal_newlines=True).split()
+    if len(res) == 0 or res[0] not in ['0', '1']:
+        raise Exception("ltl3dra did not finished as expected")
+    return res[0] == '1'
+
+def fragment_of(form):
+    """Returns ``'ltl3dra'`` or ``'full'`` for ``form``."""
+    return 'ltl3dra' if in_ltlgux(form) else 'full'
+
+@lru_cache(maxsize=None)
+def sample_words(aps, count=SAMPLE_WORDS):
+    """Returns ``count`` lasso words (in Spot's syntax) over the atomic
+    propositions ``aps`` (a tuple). The words depend only on ``aps``.
+    """
+    rng = np.random.RandomState(len(aps))
+    def letter():
+        return '&'.join(a if rng.randint(2) else '!' + a for a in aps) or '1'
+    words = []
+    for _ in range(count):
+        prefix = [letter() for _ in range(rng.randint(3))]
+        cycle = [letter() for _ in range(1 + rng.randint(3))]
+        words.append('; '.join(prefix +
+                               ['cycle{{{}}}'.format('; '.join(cycle))]))
+    return words
+
+def signature(form):
+    """Returns a pair ``(aps, bits)`` of the atomic propositions of
+    ``form`` and of the string of memberships of ``sample_words(aps)``
+    in its language. Equivalent formulas have equal signatures.
+    """
+    f = spot.formula(form)
+    aps = tuple(sorted(str(a) for a in spot.atomic_prop_collect(f)))
+    aut = spot.translate(f)
+    bits = ''.join('1' if aut.intersects(spot.parse_word(
+                              w, aut.get_dict()).as_automaton()) else '0'
+                   for w in sample_words(aps))
+    return aps, bits
+
+def batch_seed(seed, batch):
+    """Seed for batch number ``batch`` of a generation with ``seed``."""
+    return int(np.random.SeedSequence([seed, batch]).generate_state(1)[0]
+               % (2**31 - 1))
+
+def generate_batch(task):
+    """Generates one batch of formulas. Runs in a worker process.
+
+    Parameters
+    ----------
+    task : a tuple ``(seed, size, ap, priorities, tree_size, classify)``
+
+    Returns a list of triples ``(formula, fragment, signature)`` of
+    non-trivial formulas, ``fragment`` is ``None`` unless ``classify``
+    is ``True``.
+    """
+    seed, size, ap, priorities, tree_size, classify = task
+    gen = spot.randltl(ap, ltl_priorities=priorities, simplify=3,
+                       tree_size=tree_size, seed=seed).\
+                       relabel_bse(spot.Pnn).unabbreviate('WM')
+    c = spot.language_containment_checker()
+    res = []
+    for _ in range(size):
+        form = next(gen)
+        if c.equal(form, spot.formula.tt()) or \
+           c.equal(form, spot.formula.ff()):
+            continue
+        form = str(form)
+        res.append((form, fragment_of(form) if classify else None,
+                    signature(form)))
+    return res
+
+class Deduplicator(object):
+    """Keeps formulas that are not equivalent to any formula seen
+    before. Formulas are bucketed by their signatures (see
+    ``signature``).
+    """
+    def __init__(self):
+        self.printed = set()
+        self.buckets = {}
+        self.checker = spot.language_containment_checker()
+
+    def add(self, form, key=None):
+        """Returns ``True`` and remembers ``form`` if it is new. ``key``
+        is the signature of ``form``, computed if not given.
+        """
+        if form in self.printed:
+            return False
+        f = spot.formula(form)
+        if key is None:
+            key = signature(form)
+        bucket = self.buckets.setdefault(key, [])
+        for g in bucket:
+            if self.checker.equal(f, g):
+                return False
+        self.printed.add(form)
+        bucket.append(f)
+        return True
+
+def generate(n=100, fragment=None, filename=None, seed=0,
+             priorities='M=0,W=0,xor=0', ap=['a','b','c','d','e'],
+             tree_size=15, processes=None, batch=50):
+    '''Generates ``n`` pairwise non-equivalent formulas. If ``fragment``
+    (``'ltl3dra'`` or ``'full'``) is given, only formulas of the fragment
+    are kept. If ``filename`` is given, the formulas are printed into it.
+
+    Parameters
+    ----------
+    seed : int, default 0
+        the output is fully determined by ``seed`` (and other parameters
+        except ``processes``)
+    processes : int, default ``None`` (number of CPUs)
+    batch : int, default 50
+        number of formulas generated by a worker at once
+    '''
+    if fragment is not None and fragment not in FRAGMENTS:
+        raise ValueError(fragment)
+    classify = fragment is not None
+    dedup = Deduplicator()
+    forms = []
+    next_batch = 0
+    # Batches are consumed in rounds and in order, so the output does
+    # not depend on timing nor on the number of processes
+    rounds = 2 * (processes or os.cpu_count() or 1)
+    with ProcessPoolExecutor(processes) as pool:
+        while len(forms) < n:
+            tasks = [(batch_seed(seed, b), batch, ap, priorities,
+                      tree_size, classify)
+                     for b in range(next_batch, next_batch + rounds)]
+            next_batch += rounds
+            for res in pool.map(generate_batch, tasks):
+                for form, frag, key in res:
+                    if len(forms) == n:
+                        break
+                    if classify and frag != fragment:
+                        continue
+                    if dedup.add(form, key):
+                        forms.append(form)
+    if filename is not None:
+        with open(filename, 'w') as f:
+            for form in forms:
+                print(form, file=f)
+    return forms
+
+def categorize(form_file, prefix, processes=None):
+    """Splits formulas from ``form_file`` into ``<prefix>_ltl3dra.ltl``
+    and ``<prefix>_full.ltl`` classifying them in parallel.
+    """
+    with open(form_file, 'r') as source:
+        forms = [line.strip() for line in source if line.strip()]
+    with ProcessPoolExecutor(processes) as pool:
+        frags = list(pool.map(fragment_of, forms, chunksize=16))
+    with open('{}_ltl3dra.ltl'.format(prefix), 'w') as ltl3dra, \
+         open('{}_full.ltl'.format(prefix), 'w') as full:
+        for form, frag in zip(forms, frags):
+            print(form, file=ltl3dra if frag == 'ltl3dra' else full)
@@ -4,11 +4,35 @@ import sys
 import os.path
 import re
 import math
+import csv
+import json
+import shlex
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 import spot
 from IPython.display import SVG
 from datetime import datetime
+import numpy as np
 import pandas as pd
+from bootstrap import bootstrap_sums, ci_frame, win_indicators
 from experiments_lib import hoa_to_spot, dot_to_svg, pretty_print
+from reference_check import check_automata
+from aut_store import AutomatonStore, normalize
+from result_tensor import ResultTensor
+from run_diff import diff_runs
+from scheduling import CostModel, read_formulas, makespan, longest_first
+from tool_wrapper import STAGES_ENV, memout_status
+from spot_fastpath import fast_plan, run_killable
+from events import EventLog, LogLineParser
+from profiling import PROFILER, phase, profiled
+
+WRAPPER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       'tool_wrapper.py')
+# Translator called by ltl2dstar (see ``tools_hier.det_pair``)
+DSTAR_TRANSLATOR = re.compile(r'-t "([^"]*)"')
+STAGE_COL = re.compile(r'(time|states)_stage\d+$')
 
 def bogus_to_lcr(form):
     """Converts a formula as it is printed in ``_bogus.ltl`` file
@@ -139,6 +163,116 @@ def parse_log_tools(log_f):
     log.close()
     return tools
 
+def incorrect_overlay(res_file):
+    """Returns the name of the overlay file that journals automata
+    marked as incorrect for results stored in ``res_file``.
+    """
+    return res_file[:-4] + '_incorrect.csv'
+
+def read_incorrect_overlay(res_file):
+    """Returns a set of ``(formula, tool)`` pairs journaled in the
+    overlay of ``res_file``. The formulas are already pretty-printed.
+    """
+    overlay = incorrect_overlay(res_file)
+    if not os.path.isfile(overlay):
+        return set()
+    marked = pd.read_csv(overlay, dtype=str)
+    return set(zip(marked['formula'], marked['tool']))
+
+def events_file_for(res_file):
+    """Returns the name of the JSONL event log (see ``events``) written
+    by runs that store results in ``res_file``.
+    """
+    return res_file[:-4] + '_events.jsonl'
+
+def stats_of(res_file):
+    """Reads ltlcross results from ``res_file`` without automata."""
+    return pd.read_csv(res_file, usecols=lambda c: c != 'automaton')
+
+def overlay_mask(formulas, tools, marked):
+    """Returns a boolean array that is ``True`` for rows whose
+    ``(formula, tool)`` pair is in ``marked``.
+    """
+    keys = pd.MultiIndex.from_arrays([formulas, tools])
+    return keys.isin(list(marked))
+
+def timing_key(res):
+    """Returns an index that identifies rows of ltlcross results
+    across runs by formula, tool, and the order of repeated pairs.
+    """
+    occ = res.groupby(['formula', 'tool']).cumcount()
+    return pd.MultiIndex.from_arrays([res['formula'], res['tool'], occ])
+
+def stages_file_for(res_file):
+    """Returns the name of the JSONL file with per-stage records of
+    piped tools (see ``tool_wrapper``) for results in ``res_file``.
+    """
+    return res_file[:-4] + '_stages.jsonl'
+
+def split_stages(cmd):
+    """Splits the shell command ``cmd`` on top-level pipes. Pipes inside
+    quotes and ``||`` are kept.
+    """
+    stages = []
+    quote = None
+    start = 0
+    i = 0
+    while i < len(cmd):
+        c = cmd[i]
+        if c == '\\' and quote != "'":
+            i += 1
+        elif quote is not None:
+            if c == quote:
+                quote = None
+        elif c in '"\'':
+            quote = c
+        elif c == '|':
+            if cmd[i+1:i+2] == '|':
+                i += 1
+            else:
+                stages.append(cmd[start:i].strip())
+                start = i + 1
+        i += 1
+    stages.append(cmd[start:].strip())
+    return stages
+
+def read_stages(stages_file):
+    """Returns a DataFrame with columns ``formula``, ``tool``,
+    ``time_stage<i>`` and ``states_stage<i>`` (the size of the automaton
+    passed from stage ``i`` to the next one) from ``stages_file``.
+    Formulas are pretty-printed.
+    """
+    rows = []
+    with open(stages_file, 'r') as f:
+        for line in f:
+            record = json.loads(line)
+            row = {'formula' : record['formula'], 'tool' : record['tool']}
+            stages = record['stages']
+            for i, stage in enumerate(stages, 1):
+                row['time_stage{}'.format(i)] = stage['time']
+                if i < len(stages):
+                    row['states_stage{}'.format(i)] = stage.get('states')
+            rows.append(row)
+    res = pd.DataFrame(rows, columns=['formula', 'tool'] if not rows else None)
+    res['formula'] = res['formula'].map(pretty_print)
+    return res
+
+def wrap_command(cmd, wrapper_args):
+    """Returns ltlcross command that runs ``cmd`` through ``tool_wrapper.py``
+    with ``wrapper_args``. The command is passed in double quotes so
+    that ltlcross can still substitute ``%f``, ``%O``, etc. If ``cmd``
+    is a list, each item is passed as a separate stage.
+    """
+    if isinstance(cmd, str):
+        cmd = [cmd]
+    stages = []
+    for stage in cmd:
+        for c in ['\\', '"', '$', '`']:
+            stage = stage.replace(c, '\\' + c)
+        stages.append('"{}"'.format(stage))
+    return '{} {} {} -- {}'.format(sys.executable, WRAPPER,
+                                  ' '.join(wrapper_args), ' '.join(stages))
+
 class LtlcrossRunner(object):
     """A class for running Spot's `ltlcross` and storing and manipulating
     its results. For LTL3HOA it can also draw very weak alternating automata
@@ -158,14 +292,45 @@ class LtlcrossRunner(object):
         filename to store the ltlcross`s results
     cols : list of Strings, default ``['states','edges','transitions']``
         names of ltlcross's statistics columns to be recorded
+    mem_limit : int, default ``None``
+        memory limit (in MB) for each translation (with all its
+        processes); breaches are reported with exit status ``memout``
+    mem_limits : a dict (String -> int), default ``None``
+        per-tool memory limits that override ``mem_limit``
+    total_mem_limit : int, default ``None``
+        memory limit (in MB) for all translations running at the same
+        time; the largest one is killed on a breach
+    store_file : String, default ``automata.sqlite`` next to ``res_filename``
+        the automaton store used by ``store_automata``
+    profile : Boolean, default ``False``
+        if ``True``, enables the phase profiler (see ``profiling``)
+    stage_timing : Boolean, default ``False``
+        if ``True``, stages of piped tools (``a | b > %O`` and ltl2dstar's
+        ``-t`` translator) are timed separately, see ``add_stage_columns``
+
+    If any memory limit is set or ``stage_timing`` is ``True``, all tools
+    run through ``tool_wrapper.py``. The wrapper adds the startup of
+    a Python interpreter (some 30-60 ms) to ``time`` of each translation;
+    it is the same for all tools, so their times stay comparable, but
+    only to times measured with the wrapper as well.
     """
     def __init__(self, tools,
                  formula_files=['formulae/classic.ltl'],
                  res_filename='na_comp.csv',
                  cols=['states', 'edges', 'transitions'],
                  log_file=None,
+                 mem_limit=None,
+                 mem_limits=None,
+                 total_mem_limit=None,
+                 store_file=None,
+                 profile=False,
+                 stage_timing=False,
                 ):
         self.tools = tools
+        self.mem_limit = mem_limit
+        self.mem_limits = {} if mem_limits is None else mem_limits
+        self.total_mem_limit = total_mem_limit
+        self.stage_timing = stage_timing
         self.mins = []
         self.f_files = formula_files
         self.cols = cols.copy()
@@ -180,6 +345,111 @@ class LtlcrossRunner(object):
             self.log_file = self.res_file[:-3] + 'log'
         else:
             self.log_file = log_file
+        if store_file is None:
+            self.store_file = os.path.join(os.path.dirname(self.res_file),
+                                           'automata.sqlite')
+        else:
+            self.store_file = store_file
+        self.aut_store = None
+        self.aut_hashed = False
+        if profile:
+            PROFILER.enable()
+
+    def profile_summary(self):
+        """Returns wall time, calls and peak memory for each profiled
+        phase (see ``profiling.Profiler.summary``).
+        """
+        return PROFILER.summary()
+
+    def export_profile(self, path, fmt='chrome'):
+        """Exports profiled phases for profilers or flame-graph tools,
+        see ``profiling.Profiler.export``.
+        """
+        PROFILER.export(path, fmt)
+
+    def tool_cmd(self, name):
+        """Returns the ltlcross command for tool ``name``. The command is
+        wrapped by ``tool_wrapper.py`` if ``self.wrapped()``.
+        """
+        cmd = self.tools[name]
+        wrapper_args = []
+        limit = self.mem_limits.get(name, self.mem_limit)
+        if limit is not None:
+            wrapper_args.append('--mem-limit={}'.format(limit))
+        if self.total_mem_limit is not None:
+            wrapper_args.append('--total-limit={}'.format(self.total_mem_limit))
+            wrapper_args.append('--root={}'.format(os.getpid()))
+        if self.has_stages(name):
+            inner = '-t "{} {} --inner -- \\1"'.format(sys.executable, WRAPPER)
+            cmd = [DSTAR_TRANSLATOR.sub(inner, stage)
+                   for stage in split_stages(cmd)]
+            wrapper_args += ['--stages', '--tool', shlex.quote(name),
+                             '--formula', '%f']
+        if self.wrapped():
+            cmd = wrap_command(cmd, wrapper_args)
+        return cmd
+
+    def wrapped(self):
+        """Returns ``True`` if tools run through ``tool_wrapper.py``.
+        All tools are wrapped if any of them needs it, so that the
+        overhead of the wrapper does not skew comparisons of ``time``.
+        """
+        return self.mem_limit is not None or bool(self.mem_limits) or \
+               self.total_mem_limit is not None or self.stage_timing
+
+    def has_stages(self, name):
+        """Returns ``True`` if stages of tool ``name`` are timed."""
+        cmd = self.tools[name]
+        return self.stage_timing and (len(split_stages(cmd)) > 1 or
+                                      DSTAR_TRANSLATOR.search(cmd) is not None)
+
+    def stage_env(self, res_file):
+        """Returns the environment for ltlcross runs that store results
+        in ``res_file``, ``None`` to inherit the current one.
+        """
+        if not self.stage_timing:
+            return None
+        env = dict(os.environ)
+        env[STAGES_ENV] = os.path.abspath(stages_file_for(res_file))
+        return env
+
+    def add_stage_columns(self, res_file=None, follow=True):
+        """Moves the per-stage records of piped tools into ``res_file``
+        as new columns
+
+         * ``time_stage<i>``   -- running time of the ``i``-th stage
+         * ``states_stage<i>`` -- number of states of the automaton that
+           the ``i``-th stage passed to the next one (N/A if it is not
+           in the HOA format)
+
+        and adds them to ``self.cols`` if ``follow``. Tools that are not
+        piped have N/A in these columns. For ltl2dstar with ``-t``, the first stage
+        is the translator and the second one the determinization.
+        """
+        if res_file is None:
+            res_file = self.res_file
+        stages_file = stages_file_for(res_file)
+        if not os.path.isfile(stages_file):
+            return
+        stages = read_stages(stages_file)
+        os.remove(stages_file)
+        if stages.empty or not os.path.isfile(res_file):
+            return
+        stages = stages.set_index(timing_key(stages)).drop(
+            columns=['formula', 'tool'])
+        res = pd.read_csv(res_file)
+        res = res.drop(columns=[c for c in stages.columns if c in res.columns])
+        pretty = res[['formula', 'tool']].copy()
+        pretty['formula'] = pretty['formula'].map(pretty_print)
+        res = res.join(stages.reindex(timing_key(pretty)).set_axis(res.index))
+        res.to_csv(res_file, index=False)
+        if follow:
+            self.follow_columns(sorted(stages.columns))
+
+    def follow_columns(self, cols):
+        for col in cols:
+            if col not in self.cols:
+                self.cols.append(col)
 
     def create_args(self, automata=True, check=False, timeout='300',
                      log_file=None, res_file=None,
@@ -195,7 +465,7 @@ class LtlcrossRunner(object):
             tool_subset=self.tools.keys()
 
         ### Prepare ltlcross command ###
-        tools_strs = ["{"+name+"}" + cmd for (name, cmd) in self.tools.items() if name in tool_subset]
+        tools_strs = ["{"+name+"}" + self.tool_cmd(name) for name in self.tools if name in tool_subset]
         if escape_tools:
             tools_strs = ["'{}'".format(t_str) for t_str in tools_strs]
         args = tools_strs
@@ -235,11 +505,12 @@ class LtlcrossRunner(object):
                                     escape_tools=True)
         return ' '.join([lcr] + args)
 
+    @profiled
     def run_ltlcross(self, args=None, automata=True,
                      check=False, timeout='300',
                      log_file=None, res_file=None,
                      save_bogus=True, tool_subset=None,
-                     lcr='ltlcross'):
+                     lcr='ltlcross', cpus=None):
         """Removes any older version of ``self.res_file`` and runs `ltlcross`
         on all tools.
 
@@ -247,6 +518,12 @@ class LtlcrossRunner(object):
         ----------
         args : a list of ltlcross arguments that can be used for subprocess
         tool_subset : a list of names from self.tools
+        cpus : String, default ``None``
+            if set, ltlcross and all tools are pinned to these CPUs using
+            ``taskset -c cpus`` (e.g. ``'2'`` or ``'2,3'``)
+
+        Besides the log, the run writes a JSONL event stream into
+        ``events_file_for(res_file)``, see ``events``.
         """
         if log_file is None:
             log_file = self.log_file
@@ -259,48 +536,511 @@ class LtlcrossRunner(object):
                                     log_file, res_file,
                                     save_bogus, tool_subset)
 
-        # Delete ltlcross result and lof files
-        subprocess.call(["rm", "-f", res_file, log_file])
+        events_file = events_file_for(res_file)
+
+        # Delete ltlcross result and lof files (with marks of old automata)
+        subprocess.call(["rm", "-f", res_file, log_file, events_file,
+                         stages_file_for(res_file),
+                         incorrect_overlay(res_file)])
 
         ## Run ltlcross ##
         log = open(log_file,'w')
         cmd = self.ltlcross_cmd(args,lcr=lcr)
-        print(cmd, file=log)
+        prefix = [] if cpus is None else ['taskset', '-c', str(cpus)]
+        print(' '.join(prefix + [cmd]), file=log)
         print(datetime.now().strftime('[%d.%m.%Y %T]'), file=log)
         print('=====================', file=log,flush=True)
-        self.returncode = subprocess.call([lcr] + args, stderr=subprocess.STDOUT, stdout=log)
+
+        events = EventLog(events_file)
+        events.emit('run_start', cmd=cmd, res_file=res_file,
+                    backend='ltlcross')
+        names = [t for t in self.tools if t in tool_subset]
+        for i, name in enumerate(names):
+            events.emit('tool_registered', tool_id='P{}'.format(i),
+                        tool=name, cmd=self.tools[name])
+        start = time.time()
+        # Copy ltlcross output into the log and turn it into events;
+        # bytes that are not UTF-8 (from tools' stderr) are replaced
+        parser = LogLineParser(events, names)
+        proc = subprocess.Popen(prefix + [lcr] + args, stderr=subprocess.STDOUT,
+                                stdout=subprocess.PIPE, universal_newlines=True,
+                                errors='replace', env=self.stage_env(res_file))
+        try:
+            for line in proc.stdout:
+                log.write(line)
+                log.flush()
+                parser.feed(line)
+            parser.finish()
+            self.returncode = proc.wait()
+        except BaseException:
+            # Do not leave ltlcross running (e.g. on KeyboardInterrupt)
+            proc.kill()
+            proc.wait()
+            log.close()
+            events.close()
+            raise
+        log.writelines([str(self.returncode)+'\n'])
+        log.close()
+        self.add_stage_columns(res_file)
+
+        if os.path.isfile(res_file):
+            events.emit_results(stats_of(res_file), 'tool_stats')
+        events.emit('run_end', returncode=self.returncode,
+                    duration=time.time() - start)
+        events.close()
+
+    @profiled
+    def run_job(self, form_id, form, tool, parts_dir,
+                automata=True, timeout='300', lcr='ltlcross'):
+        """Runs `ltlcross` on formula ``form`` (with id ``form_id``) and
+        ``tool`` only. The results and log are stored in ``parts_dir``
+        under ``<form_id>.<tool index>``. Returns the ltlcross returncode.
+        """
+        part = os.path.join(parts_dir, '{}.{}'.format(
+            form_id, list(self.tools).index(tool)))
+        with open(part + '.ltl', 'w') as f_file:
+            print(form, file=f_file)
+        args = self.create_args(automata=automata, check=False,
+                                timeout=timeout, log_file=part + '.log',
+                                res_file=part + '.csv', save_bogus=False,
+                                tool_subset=[tool], forms=False)
+        args += ['-F', part + '.ltl']
+        with open(part + '.log', 'w') as log:
+            ret = subprocess.call([lcr] + args, stderr=subprocess.STDOUT,
+                                  stdout=log, env=self.stage_env(part + '.csv'))
+        # Parallel jobs must not change self.cols, see run_parallel
+        self.add_stage_columns(part + '.csv', follow=False)
+        return ret
+
+    def fast_tools(self, tool_subset=None):
+        """Returns a dict ``tool``->``plan`` for tools from ``tool_subset``
+        that can be run in-process by ``spot_fastpath``. If tools are
+        wrapped (see ``wrapped``), all of them run as subprocesses.
+        """
+        if tool_subset is None:
+            tool_subset = self.tools.keys()
+        plans = {}
+        if self.wrapped():
+            return plans
+        for tool in tool_subset:
+            plan = fast_plan(self.tools[tool])
+            if plan is not None:
+                plans[tool] = plan
+        return plans
+
+    @profiled
+    def run_fast_job(self, form_id, form, tool, parts_dir, plan,
+                     automata=True, timeout='300'):
+        """Runs ``tool`` on formula ``form`` in-process (in a separate
+        process) following ``plan`` (see
+        ``spot_fastpath.fast_plan``). Results are stored in
+        ``parts_dir`` in the same way as by ``run_job``.
+
+        A translation that exceeds ``timeout`` is killed and reported as
+        ``timeout``. The time of successful translations is stored in
+        ``time_inproc`` and ``time`` is N/A, as it would not be comparable
+        with ``time`` measured by ltlcross.
+        """
+        part = os.path.join(parts_dir, '{}.{}'.format(
+            form_id, list(self.tools).index(tool)))
+        # ``None`` means no timeout as in ``create_args``
+        limit = None if timeout is None else float(timeout)
+        # Jobs run without checks, so negations are not translated
+        try:
+            row = run_killable(form, plan, automata, limit)
+        except TimeoutError:
+            row = {'exit_status' : 'timeout', 'time' : limit}
+        except Exception:
+            row = {'exit_status' : 'exit code', 'exit_code' : 2}
+        row.update({'formula' : form, 'tool' : tool})
+        first = ['formula', 'tool', 'exit_status', 'exit_code', 'time']
+        res = pd.DataFrame([row])
+        res = res.reindex(columns=first +
+                          [c for c in res.columns if c not in first])
+        res.to_csv(part + '.csv', index=False)
+        with open(part + '.log', 'w') as log:
+            print('{}.ltl:1: {}'.format(part, form), file=log)
+            print('Running [P0]: in-process {}'.format(self.tools[tool]),
+                  file=log)
+            print('', file=log)
+        return 0
+
+    def skip_job(self, form_id, form, tool, parts_dir):
+        """Records ``tool`` on formula ``form`` with exit status
+        ``skipped`` in ``parts_dir`` as ``run_job`` would store results.
+        Used for tools suspended by a circuit breaker.
+        """
+        part = os.path.join(parts_dir, '{}.{}'.format(
+            form_id, list(self.tools).index(tool)))
+        pd.DataFrame({'formula' : [form],
+                      'tool' : tool, 'exit_status' : 'skipped'}).\
+            to_csv(part + '.csv', index=False)
+        with open(part + '.log', 'w') as log:
+            print('{}.ltl:1: {}'.format(part, form), file=log)
+            print('Skipping [P0]: suspended by circuit breaker', file=log)
+            print('', file=log)
+        return 0
+
+    @profiled
+    def compare_fast_path(self, formulas=None, tool_subset=None,
+                          timeout='300', lcr='ltlcross'):
+        """Runs tools that ``fast_tools`` recognises on ``formulas``
+        (formulas from ``self.f_files`` by default) both by ltlcross and
+        in-process and returns a DataFrame with all differences in
+        statistics (except ``time``) and automata. Automata are compared
+        without their ``name:`` and ``tool:`` headers. Columns written
+        by one side only are reported with values ``present`` and
+        ``missing``, different numbers of rows in the column ``rows``.
+        """
+        if formulas is None:
+            formulas = read_formulas(self.f_files)
+        plans = self.fast_tools(tool_subset)
+        tmp_dir = tempfile.mkdtemp(prefix='fastpath.',
+                                   dir=os.path.dirname(self.res_file) or '.')
+        sub_dir = os.path.join(tmp_dir, 'sub')
+        fast_dir = os.path.join(tmp_dir, 'fast')
+        os.makedirs(sub_dir)
+        os.makedirs(fast_dir)
+        ignore = ['formula', 'tool', 'time', 'time_inproc', 'exit_code']
+        diffs = []
+        for form_id, form in enumerate(formulas):
+            for tool, plan in plans.items():
+                self.run_job(form_id, form, tool, sub_dir,
+                             True, timeout, lcr)
+                self.run_fast_job(form_id, form, tool, fast_dir, plan,
+                                  True, timeout)
+                name = '{}.{}.csv'.format(form_id,
+                                          list(self.tools).index(tool))
+                sub = pd.read_csv(os.path.join(sub_dir, name))
+                fast = pd.read_csv(os.path.join(fast_dir, name))
+                for col in sub.columns.symmetric_difference(fast.columns):
+                    if col in ignore:
+                        continue
+                    sides = ('present', 'missing') if col in sub.columns \
+                            else ('missing', 'present')
+                    diffs.append((form, tool, col) + sides)
+                if len(sub) != len(fast):
+                    diffs.append((form, tool, 'rows', len(sub), len(fast)))
+                cols = [c for c in fast.columns
+                        if c in sub.columns and c not in ignore]
+                for i in range(min(len(sub), len(fast))):
+                    for col in cols:
+                        a, b = sub.loc[i, col], fast.loc[i, col]
+                        if col == 'automaton' and isinstance(a, str) \
+                           and isinstance(b, str):
+                            a, b = normalize(a), normalize(b)
+                        if a != b and not (pd.isnull(a) and pd.isnull(b)):
+                            diffs.append((sub.loc[i, 'formula'], tool,
+                                          col, a, b))
+        shutil.rmtree(tmp_dir)
+        return pd.DataFrame(diffs, columns=['formula', 'tool', 'column',
+                                            'ltlcross', 'fast'])
+
+    @profiled
+    def merge_parts(self, pairs, parts_dir, res_file, log):
+        """Merges results and logs of jobs ``pairs`` (``(form_id, tool)``)
+        stored in ``parts_dir`` into ``res_file`` and the open ``log``.
+        Formula numbers and tool ids in the logs are rewritten so that the
+        log can be used by ``parse_check_log`` and friends.
+        """
+        f_name = ','.join(self.f_files)
+        f_line = re.compile(r'^.*\.ltl:1: ')
+        t_code = re.compile(r'\[([PN])0\]')
+        parts = []
+        for form_id, tool in pairs:
+            t_id = list(self.tools).index(tool)
+            parts.append((form_id, t_id,
+                os.path.join(parts_dir, '{}.{}'.format(form_id, t_id))))
+
+        # Parts written by the Spot fast path can have other columns
+        headers = {}
+        fields = []
+        for _, _, part in parts:
+            if os.path.isfile(part + '.csv'):
+                with open(part + '.csv', 'r', newline='') as p_csv:
+                    header = next(csv.reader([p_csv.readline()]), [])
+                headers[part] = header
+                fields += [f for f in header if f not in fields]
+
+        with open(res_file, 'w', newline='') as res:
+            csv.writer(res).writerow(fields)
+            for form_id, t_id, part in parts:
+                if part in headers:
+                    with open(part + '.csv', 'r', newline='') as p_csv:
+                        p_csv.readline()
+                        if headers[part] == fields:
+                            shutil.copyfileobj(p_csv, res)
+                        else:
+                            idx = [headers[part].index(f)
+                                   if f in headers[part] else None
+                                   for f in fields]
+                            writer = csv.writer(res)
+                            for row in csv.reader(p_csv):
+                                writer.writerow(['' if i is None else row[i]
+                                                 for i in idx])
+                with open(part + '.log', 'r') as p_log:
+                    for line in p_log:
+                        line = f_line.sub('{}:{}: '.format(f_name, form_id+1),
+                                          line)
+                        log.write(t_code.sub(r'[\g<1>{}]'.format(t_id), line))
+
+    @profiled
+    def run_parallel(self, jobs=4, history=None, timeout='300',
+                     automata=True, log_file=None, res_file=None,
+                     tool_subset=None, lcr='ltlcross', fast_spot=False,
+                     breaker=None):
+        """Runs `ltlcross` in ``jobs`` parallel processes, one for each
+        (formula, tool) pair, and merges the results into ``res_file``.
+        The sanity checks are not performed.
+
+        The pairs are scheduled longest-first according to a cost model
+        (see ``scheduling.CostModel``) built from ``time`` and
+        ``exit_status`` in ``history``. The expected makespan of the
+        schedule, of the file order, and the actual makespan are written
+        to the log and returned as a Series (also in ``self.makespan``).
+
+        Parameters
+        ----------
+        jobs : int, default 4
+            number of processes running in parallel
+        history : list of Strings, default ``[res_file]``
+            result files of earlier runs
+        tool_subset : a list of names from self.tools
+        fast_spot : Boolean, default ``False``
+            if ``True``, tools that are Spot itself are run in-process
+            (see ``fast_tools`` and ``compare_fast_path``); their ``time``
+            is N/A and the in-process time is stored in ``time_inproc``
+        breaker : ``circuit_breaker.CircuitBreaker``, default ``None``
+            policy that suspends tools after consecutive failures; jobs
+            of suspended tools get the exit status ``skipped``
+        """
+        if log_file is None:
+            log_file = self.log_file
+        if res_file is None:
+            res_file = self.res_file
+        if tool_subset is None:
+            tool_subset = self.tools.keys()
+        if history is None:
+            history = [res_file]
+
+        # The history must be read before the old results are deleted
+        model = CostModel(history, timeout)
+        formulas = read_formulas(self.f_files)
+        tools = [t for t in self.tools if t in tool_subset]
+        pairs = [(f_id, t) for f_id in range(len(formulas)) for t in tools]
+        costs = [model.job_cost(formulas[f_id], t) for f_id, t in pairs]
+        file_order = makespan(costs, jobs)
+        schedule, costs = longest_first(pairs, costs)
+
+        parts_dir = res_file[:-4] + '.parts'
+        events_file = events_file_for(res_file)
+        subprocess.call(["rm", "-rf", res_file, log_file, parts_dir,
+                         events_file, incorrect_overlay(res_file)])
+        os.makedirs(parts_dir)
+
+        log = open(log_file, 'w')
+        print('parallel ltlcross ({} jobs): {}'.format(jobs,
+              ' '.join(self.f_files)), file=log)
+        print(datetime.now().strftime('[%d.%m.%Y %T]'), file=log)
+        print('=====================', file=log)
+        for t in tools:
+            print('[P{}]: {}'.format(list(self.tools).index(t),
+                  self.tools[t]), file=log)
+        log.flush()
+
+        events = EventLog(events_file)
+        events.emit('run_start', cmd=self.ltlcross_cmd(), res_file=res_file,
+                    backend='parallel', jobs=jobs)
+        for t in tools:
+            events.emit('tool_registered',
+                        tool_id='P{}'.format(list(self.tools).index(t)),
+                        tool=t, cmd=self.tools[t])
+        started = set()
+
+        plans = self.fast_tools(tools) if fast_spot else {}
+
+        def run(pair):
+            form_id, tool = pair
+            with events.lock:
+                first = form_id not in started
+                started.add(form_id)
+            if first:
+                events.emit('formula_started', form_id=form_id,
+                            formula=formulas[form_id])
+            if breaker is not None and not breaker.allow(tool):
+                ret = self.skip_job(form_id, formulas[form_id], tool,
+                                    parts_dir)
+            elif tool in plans:
+                ret = self.run_fast_job(form_id, formulas[form_id], tool,
+                                        parts_dir, plans[tool], automata,
+                                        timeout)
+            else:
+                ret = self.run_job(form_id, formulas[form_id], tool,
+                                   parts_dir, automata, timeout, lcr)
+            part = os.path.join(parts_dir, '{}.{}.csv'.format(
+                form_id, list(self.tools).index(tool)))
+            res = stats_of(part) if os.path.isfile(part) else None
+            if res is not None:
+                events.emit_results(res)
+            if breaker is not None and \
+               (res is None or not (res.exit_status == 'skipped').all()):
+                # Memouts are reported as exit code MEMOUT_CODE by ltlcross
+                statuses = ['exit code'] if res is None else \
+                           memout_status(res.exit_status, res.get('exit_code'))
+                change = breaker.record(tool, statuses)
+                if change is not None:
+                    events.emit('tool_' + change, tool=tool, form_id=form_id)
+            return ret
+        start = time.time()
+        with ThreadPoolExecutor(jobs) as pool:
+            self.returncode = max(pool.map(run, schedule), default=0)
+        actual = time.time() - start
+
+        self.merge_parts(pairs, parts_dir, res_file, log)
+        shutil.rmtree(parts_dir)
+        if self.stage_timing:
+            self.follow_columns(sorted(c for c in pd.read_csv(res_file, nrows=0)
+                                       if STAGE_COL.match(c)))
+        self.makespan = pd.Series({
+            'expected (file order)'    : file_order,
+            'expected (longest first)' : makespan(costs, jobs),
+            'actual'                   : actual,
+        })
+        print(self.makespan.to_string(), file=log)
         log.writelines([str(self.returncode)+'\n'])
         log.close()
+        events.emit('run_end', returncode=self.returncode, duration=actual,
+                    **self.makespan.to_dict())
+        events.close()
+        return self.makespan
+
+    @profiled
+    def run_timing(self, repeats=5, warmup=1, cpus=None,
+                   timeout='300', tool_subset=None, lcr='ltlcross'):
+        """Measures the running time of each (formula, tool) pair
+        ``repeats`` times and stores the statistics as new columns of
+        ``self.res_file`` next to ``time``:
+
+         * ``time_median`` -- median of the measured times
+         * ``time_min``    -- minimal measured time
+         * ``time_mad``    -- median absolute deviation from the median
+
+        The columns are also added to ``self.cols``. Each measurement is
+        a separate ltlcross run without automata and checks. Only runs
+        with ``exit_status`` ``ok`` are taken into account.
+
+        Parameters
+        ----------
+        repeats : int, default 5
+            number of measured runs
+        warmup : int, default 1
+            number of runs executed (and ignored) before the measured
+            ones to warm up file caches
+        cpus : String, default ``None``
+            CPUs to pin the runs to, see ``run_ltlcross``
+        """
+        if not os.path.isfile(self.res_file):
+            raise FileNotFoundError(self.res_file)
+        runs = []
+        for i in range(warmup + repeats):
+            res_file = '{}.time{}.csv'.format(self.res_file[:-4], i)
+            log_file = res_file[:-3] + 'log'
+            self.run_ltlcross(automata=False, check=False, timeout=timeout,
+                              log_file=log_file, res_file=res_file,
+                              save_bogus=False, tool_subset=tool_subset,
+                              lcr=lcr, cpus=cpus)
+            if i >= warmup:
+                run = pd.read_csv(res_file)
+                times = run.time.where(run.exit_status == 'ok')
+                runs.append(times.set_axis(timing_key(run)))
+            os.remove(res_file)
+            os.remove(log_file)
+            os.remove(events_file_for(res_file))
+
+        times = pd.concat(runs, axis=1)
+        median = times.median(axis=1)
+        stats = pd.DataFrame({
+            'time_median' : median,
+            'time_min'    : times.min(axis=1),
+            'time_mad'    : times.sub(median, axis=0).abs().median(axis=1),
+        })
+        res = pd.read_csv(self.res_file)
+        res = res.drop(columns=[c for c in stats.columns if c in res.columns])
+        res = res.join(stats.reindex(timing_key(res)).set_axis(res.index))
+        res.to_csv(self.res_file, index=False)
+        for col in stats.columns:
+            if col not in self.cols:
+                self.cols.append(col)
 
-    def parse_results(self, res_file=None):
+    @profiled
+    def parse_results(self, res_file=None, dense=False):
         """Parses the ``self.res_file`` and sets the values, automata, and
         form. If there are no results yet, it runs ltlcross before.
+
+        If ``dense`` is ``True``, the results are loaded into a
+        ``ResultTensor`` (stored in ``self.tensor``) without pivoting
+        and ``values`` and ``incorrect`` are views of it. Automata are not
+        loaded in this mode (``automata`` is ``None``).
+
+        Followed columns missing in the results (such as ``time_median``
+        after a new run without ``run_timing``) are left out of ``values``.
         """
         if res_file is None:
             res_file = self.res_file
         if not os.path.isfile(res_file):
             raise FileNotFoundError(res_file)
-        res = pd.read_csv(res_file)
+        header = pd.read_csv(res_file, nrows=0).columns
+        cols = [c for c in self.cols if c in header]
+        if dense:
+            with phase('parse_results:tensor'):
+                tensor = ResultTensor.from_csv(res_file, cols,
+                                               read_incorrect_overlay(res_file))
+            self.tensor = tensor
+            self.automata = None
+            self.aut_hashed = False
+            self.form = pd.DataFrame(index=tensor.index)
+            self.values = tensor.values()
+            self.exit_status = tensor.exit_status()
+            self.incorrect = tensor.incorrect()
+            return
+        with phase('parse_results:read_csv'):
+            res = pd.read_csv(res_file)
         # Add incorrect columns to track flawed automata
         if not 'incorrect' in res.columns:
             res['incorrect'] = False
         # Removes unnecessary parenthesis from formulas
-        res.formula = res['formula'].map(pretty_print)
+        with phase('parse_results:pretty_print'):
+            res.formula = res['formula'].map(pretty_print)
+        # Tools killed by tool_wrapper.py for exceeding memory limits
+        if 'exit_code' in res.columns:
+            res['exit_status'] = memout_status(res.exit_status, res.exit_code)
+        # Apply automata marked as incorrect in the overlay
+        marked = read_incorrect_overlay(res_file)
+        if marked:
+            res.loc[overlay_mask(res.formula, res.tool, marked),
+                    'incorrect'] = True
 
         form = pd.DataFrame(res.formula.drop_duplicates())
         form['form_id'] = range(len(form))
         form.index = form.form_id
 
-        res = form.merge(res)
-        # Shape the table
-        table = res.set_index(['form_id', 'formula', 'tool'])
-        table = table.unstack(2)
-        table.axes[1].set_names(['column','tool'],inplace=True)
+        with phase('parse_results:pivot'):
+            res = form.merge(res)
+            # Shape the table
+            table = res.set_index(['form_id', 'formula', 'tool'])
+            table = table.unstack(2)
+            table.axes[1].set_names(['column','tool'],inplace=True)
 
-        # Create separate tables for automata
+        # Create separate tables for automata (or their keys in the store)
         automata = None
+        aut_col = None
         if 'automaton' in table.columns.levels[0]:
-            automata = table[['automaton']]
+            aut_col = 'automaton'
+        elif 'aut_hash' in table.columns.levels[0]:
+            aut_col = 'aut_hash'
+        if aut_col is not None:
+            self.aut_hashed = aut_col == 'aut_hash'
+            automata = table[[aut_col]]
 
             # Removes formula column from the index
             automata.index = automata.index.levels[0]
@@ -316,16 +1056,60 @@ class LtlcrossRunner(object):
         self.exit_status.columns = self.exit_status.columns.droplevel()
 
         # stores the followed columns only
-        values = table[self.cols]
+        values = table[cols]
         self.form = form
         self.values = values.sort_index(axis=1,level=['column','tool'])
         # self.compute_best("Minimum")
         if automata is not None:
             self.automata = automata
 
+    @profiled
+    def store_automata(self, res_file=None, chunksize=10000):
+        """Moves automata from ``res_file`` into the automaton store
+        (``self.store_file``) and replaces them by their keys stored
+        in column ``aut_hash``. The file is processed in chunks of
+        ``chunksize`` rows.
+        """
+        if res_file is None:
+            res_file = self.res_file
+        tmp_file = res_file + '.tmp'
+        header = True
+        for chunk in pd.read_csv(res_file, chunksize=chunksize):
+            if 'automaton' not in chunk.columns:
+                return
+            chunk['aut_hash'] = self.store().put_many(chunk['automaton'])
+            chunk = chunk.drop(columns=['automaton'])
+            chunk.to_csv(tmp_file, mode='w' if header else 'a',
+                         header=header, index=False)
+            header = False
+        if not header:
+            os.replace(tmp_file, res_file)
+
+    def store(self):
+        """Returns the automaton store (opens it on first use)."""
+        if self.aut_store is None:
+            self.aut_store = AutomatonStore(self.store_file)
+        return self.aut_store
+
+    def hoa(self, aut):
+        """Returns the HOA string for a value of ``self.automata``, which
+        is either the automaton itself or its key in the store.
+        """
+        if self.aut_hashed:
+            return self.store().get(aut)
+        return aut
+
+    def automata_hoa(self):
+        """Returns ``self.automata`` with keys resolved to HOA strings."""
+        if not self.aut_hashed:
+            return self.automata
+        return self.automata.applymap(self.hoa)
+
+    @profiled
     def compute_sbacc(self,col='states'):
         def get_sbacc(aut):
-            if isinstance(aut, float) and math.isnan(aut):
+            aut = self.hoa(aut)
+            if aut is None or (isinstance(aut, float) and math.isnan(aut)):
                 return None
             a = spot.automata(aut+'\n')
             aut = next(a)
@@ -352,6 +1136,7 @@ class LtlcrossRunner(object):
         df = df.applymap(get_sbacc)
         self.values = self.values.join(df)
 
+    @profiled
     def compute_best(self, tools=None, colname="Minimum"):
         """Computes minimum values over tools in ``tools`` for all
         formulas and stores them in column ``colname``.
@@ -370,9 +1155,11 @@ class LtlcrossRunner(object):
                     or t in self.mins]
         self.mins.append(colname)
         for col in self.cols:
-            self.values[col, colname] = self.values[col][tools].min(axis=1)
+            if col in self.values:
+                self.values[col, colname] = self.values[col][tools].min(axis=1)
         self.values.sort_index(axis=1, level=0, inplace=True)
 
+    @profiled
     def aut_for_id(self, form_id, tool):
         """For given formula id and tool it returns the corresponding
         non-deterministic automaton as a Spot's object.
@@ -388,8 +1175,67 @@ class LtlcrossRunner(object):
             raise AssertionError("No results parsed yet")
         if tool not in self.tools.keys():
             raise ValueError(tool)
-        return hoa_to_spot(self.automata.loc[form_id, tool])
+        return hoa_to_spot(self.hoa(self.automata.loc[form_id, tool]))
+
+    @profiled
+    def check_against_reference(self, reference=None, processes=None,
+                                cache_file=None, by_type=False):
+        """Checks each automaton against one trusted reference translation
+        of its formula instead of checking all pairs of tools. The checks
+        run in a pool of ``processes`` workers and the verdicts are cached
+        by formula and automaton hash in ``cache_file``. Requires results
+        run with ``automata=True``.
+
+        Parameters
+        ----------
+        reference : String, default ``None``
+            name of the tool used as the reference, ``None`` stands for
+            Spot's ``translate`` (also used for formulas where the
+            reference has no automaton)
+        processes : int, default ``None`` (number of CPUs)
+        cache_file : String, default ``<res_file>_verdicts.csv``
+        by_type : Boolean, default ``False``
+            if ``True``, returns the shape of ``hunt_error_types``,
+            otherwise the shape of ``parse_check_log``
+
+        Tools are identified by ``P0``, ``P1``, ... in the order of
+        ``self.tools`` as in the ltlcross log.
+        """
+        if self.automata is None:
+            raise AssertionError("No results parsed yet")
+        if reference is not None and reference not in self.tools.keys():
+            raise ValueError(reference)
+        if cache_file is None:
+            cache_file = self.res_file[:-4] + '_verdicts.csv'
+        formulas = {f_id : self.form_of_id(f_id, False)
+                    for f_id in self.automata.index}
+        verdicts = check_automata(self.automata_hoa(), formulas, reference,
+                                  processes, cache_file)
 
+        tids = {tool : 'P{}'.format(i) for i, tool in enumerate(self.tools)}
+        tools = {tids[t] : cmd for t, cmd in self.tools.items()}
+        bugs = {}
+        bogus_forms = {}
+        for form_id, row in verdicts.iterrows():
+            f_bugs = {} if by_type else []
+            for tool, verdict in row.items():
+                if not isinstance(verdict, str) or verdict == '':
+                    continue
+                for err in verdict.split(';'):
+                    if err == 'Nref':
+                        prob = '{}*Nref'.format(tids[tool])
+                    else:
+                        prob = 'Comp({})*Pref'.format(tids[tool])
+                    if by_type:
+                        f_bugs.setdefault('nonempty', []).append(prob)
+                    else:
+                        f_bugs.append('error: {} is nonempty'.format(prob))
+            if len(f_bugs) > 0:
+                bugs[form_id] = f_bugs
+                bogus_forms[form_id] = formulas[form_id]
+        return bugs, bogus_forms, tools
+
+    @profiled
     def cummulative(self, col="states"):
         """Returns table with cummulative numbers of given ``col``.
 
@@ -400,6 +1246,27 @@ class LtlcrossRunner(object):
         """
         return self.values[col].dropna().sum()
 
+    @profiled
+    def cummulative_ci(self, col="states", samples=2000, alpha=0.05, seed=0):
+        """Returns bootstrap confidence intervals for ``cummulative``.
+        The formulas are resampled ``samples`` times, the result has
+        columns ``estimate``, ``low``, and ``high`` for each tool.
+
+        Parameters
+        ---------
+        col : String
+            One of the followed columns (``states`` default)
+        samples : int, default 2000
+            number of resamples
+        alpha : float, default 0.05
+            the intervals have confidence level ``1-alpha``
+        seed : int, default 0
+            seed for the resampling
+        """
+        df = self.values[col].dropna()
+        est, low, high = bootstrap_sums(df.to_numpy(), samples, alpha, seed)
+        return ci_frame(est, low, high, df.columns)
+
     def smaller_than(self, t1, t2, reverse=False,
                      restrict=True,
                      col='states', restrict_cols=True):
@@ -429,6 +1296,7 @@ class LtlcrossRunner(object):
                     restrict_cols=restrict_cols,
                     restrict_tools=restrict)
 
+    @profiled
     def better_than(self, t1, t2, props=['states','acc'],
                     reverse=False, include_fails=True,
                     restrict_cols=True,restrict_tools=True
@@ -451,7 +1319,8 @@ class LtlcrossRunner(object):
             if ``True``, it switches ``t1`` and ``t2``
         include_fails : Boolean, default ``True``
             if ``True``, include formulae where t2 fails and t1 does not
-            fail
+            fail (any ``exit_status`` other than ``ok``, including
+            ``memout``, is a fail)
         restrict_cols : Boolean, default ``True``
             if ``True``, the returned DataFrame contains only the compared
             property columns
@@ -491,6 +1360,13 @@ class LtlcrossRunner(object):
         props = props if restrict_cols else slice(None)
         return c.loc[:,idx[props,tools]]
 
+    def diff(self, new, **kwargs):
+        """Returns (formula, tool) pairs whose results changed between
+        this runner and runner ``new``, see ``run_diff.diff_runs`` for
+        the parameters.
+        """
+        return diff_runs(self, new, **kwargs)
+
     def form_of_id(self, form_id, spot_obj=True):
         """For given form_id returns the formula
 
@@ -516,6 +1392,7 @@ class LtlcrossRunner(object):
         ni = self.values.index.droplevel(0)
         return ni.get_loc(f)
 
+    @profiled
     def mark_incorrect(self, form_id, tool,output_file=None,input_file=None):
         """Marks automaton given by the formula id and tool as flawed
         and writes it into the .csv file
@@ -537,15 +1414,85 @@ class LtlcrossRunner(object):
         csv.to_csv(output_file,index=False)
 
         # Mark the information into self.incorrect
-        self.incorrect.loc[self.index_for(form_id)][tool] = True
+        self.incorrect.loc[self.index_for(form_id), tool] = True
+
+    @profiled
+    def mark_incorrect_batch(self, pairs, res_file=None):
+        """Marks automata given by ``(form_id, tool)`` pairs as flawed.
+
+        Unlike ``mark_incorrect``, the .csv file is not rewritten. The
+        pairs are appended to a small overlay file next to it (see
+        ``incorrect_overlay``) which is applied by ``parse_results``.
+        Call ``compact_incorrect`` to fold the overlay into the .csv file.
+
+        Tool ids ``P<n>`` in the log refer to ``list(r.tools)[n]`` (if
+        ltlcross ran all tools). For example, all tools involved in some
+        error can be marked by
+
+        >>> bugs, forms, _ = parse_check_log(r.log_file)
+        >>> names = list(r.tools)
+        >>> r.mark_incorrect_batch(
+        >>>     (f_id, names[int(n)]) for f_id, lines in bugs.items()
+        >>>     for n in set(re.findall(r'[PN](\\d+)', ' '.join(lines))))
+
+        Parameters
+        ----------
+        pairs : iterable of ``(form_id, tool)``
+        res_file : String, default ``self.res_file``
+            the .csv file whose overlay is written
+        """
+        if res_file is None:
+            res_file = self.res_file
+        pairs = list(pairs)
+        for _, tool in pairs:
+            if tool not in self.tools.keys():
+                raise ValueError(tool)
+        if not pairs:
+            return
+        journal = pd.DataFrame({
+            'formula' : [self.form_of_id(f_id, False) for f_id, _ in pairs],
+            'tool'    : [tool for _, tool in pairs]
+        })
+        overlay = incorrect_overlay(res_file)
+        journal.to_csv(overlay, mode='a', index=False,
+                       header=not os.path.isfile(overlay))
+
+        # Mark the information into self.incorrect
+        for form_id, tool in pairs:
+            self.incorrect.loc[self.index_for(form_id), tool] = True
 
+    @profiled
+    def compact_incorrect(self, res_file=None):
+        """Folds the overlay written by ``mark_incorrect_batch`` into
+        the .csv file and removes the overlay.
+        """
+        if res_file is None:
+            res_file = self.res_file
+        overlay = incorrect_overlay(res_file)
+        if not os.path.isfile(overlay):
+            return
+        marked = read_incorrect_overlay(res_file)
+        csv = pd.read_csv(res_file)
+        if not 'incorrect' in csv.columns:
+            csv['incorrect'] = False
+        # Pretty-print each distinct formula only once
+        forms = csv['formula'].drop_duplicates()
+        pretty = dict(zip(forms, forms.map(pretty_print)))
+        cond = overlay_mask(csv['formula'].map(pretty), csv.tool, marked)
+        csv.loc[cond, 'incorrect'] = True
+        csv.to_csv(res_file, index=False)
+        os.remove(overlay)
+
+    @profiled
     def na_incorrect(self):
         """Marks values for flawed automata as N/A. This causes
         that the touched formulae will be removed from cummulative
         etc. if computed again. To reverse this information you
         have to parse the results again.
 
-        It also sets ``exit_status`` to ``incorrect``
+        It also sets ``exit_status`` to ``incorrect``. Automata journaled
+        by ``mark_incorrect_batch`` are included as ``parse_results``
+        applies the overlay when loading.
         """
         self.values = self.values[~self.incorrect]
         self.exit_status[self.incorrect] = 'incorrect'
@@ -553,6 +1500,7 @@ class LtlcrossRunner(object):
     def index_for(self, form_id):
         return (form_id,self.form_of_id(form_id,False))
 
+    @profiled
     def get_error_count(self,err_type='timeout',drop_zeros=True):
         """Returns a Series with total number of er_type errors for
         each tool.
@@ -560,15 +1508,15 @@ class LtlcrossRunner(object):
         Parameters
         ----------
         err_type : String one of `timeout`, `parse error`,
-                                 `incorrect`, `crash`, or
-                                 'no output'
+                                 `incorrect`, `crash`, `memout`,
+                                 `skipped`, or 'no output'
                   Type of error we seek
         drop_zeros: Boolean (default True)
                     If true, rows with zeros are removed
         """
         if err_type not in ['timeout', 'parse error',
-                            'incorrect', 'crash',
-                            'no output']:
+                            'incorrect', 'crash', 'memout',
+                            'skipped', 'no output']:
             raise ValueError(err_type)
 
         if err_type == 'crash':
@@ -578,9 +1526,10 @@ class LtlcrossRunner(object):
         else:
             res = (self.exit_status == err_type).sum()
         if drop_zeros:
-            return res.iloc[res.nonzero()]
+            return res[res != 0]
         return res
 
+    @profiled
     def cross_compare(self,tools=None,props=['states','acc'],
                       include_fails=True, total=True,
                       include_other=True):
@@ -605,6 +1554,69 @@ class LtlcrossRunner(object):
             c['V'] = c.sum(axis=1)
         return c
 
+    @profiled
+    def cross_compare_ci(self, tools=None, props=['states','acc'],
+                         include_fails=True, total=True,
+                         samples=2000, alpha=0.05, seed=0):
+        """Returns bootstrap confidence intervals for ``cross_compare``.
+        The result has columns indexed by ``(stat, tool)`` where ``stat``
+        is one of ``estimate``, ``low``, and ``high``. Only tools from
+        ``self.tools`` can be compared.
+
+        See ``cross_compare`` and ``cummulative_ci`` for parameters.
+        """
+        if tools is None:
+            tools = list(self.tools.keys())
+        for tool in tools:
+            if tool not in self.tools.keys():
+                raise ValueError(tool)
+        tools = list(tools)
+        n, t = len(self.values), len(tools)
+        ok = (self.exit_status[tools] == 'ok').to_numpy()
+        p_vals = [self.values[prop][tools].to_numpy(dtype=float)
+                  for prop in props]
+        wins = win_indicators(p_vals, ok, include_fails).reshape(n, t*t)
+        stats = wins
+        if total:
+            # Victories of a tool do not count ties with itself
+            stats = np.hstack([wins, wins.reshape(n, t, t).sum(axis=2)])
+        est, low, high = bootstrap_sums(stats, samples, alpha, seed)
+        res = {}
+        for stat, arr in zip(['estimate','low','high'], [est, low, high]):
+            c = pd.DataFrame(arr[:t*t].reshape(t, t),
+                             index=tools, columns=tools)
+            np.fill_diagonal(c.values, float('nan'))
+            if total:
+                c['V'] = arr[t*t:]
+            res[stat] = c
+        return pd.concat(res, axis=1, names=['stat','tool'])
+
+    @profiled
+    def min_counts_ci(self, tools=None, restrict_tools=False,
+                      unique_only=False, col='states',
+                      samples=2000, alpha=0.05, seed=0):
+        """Returns bootstrap confidence intervals for ``min_counts``.
+        Unlike ``min_counts`` it does not add the minimum column into
+        ``self.values``.
+
+        See ``min_counts`` and ``cummulative_ci`` for parameters.
+        """
+        if tools is None:
+            tools = list(self.tools.keys())
+        else:
+            tools = [t for t in tools if
+                     t in self.tools.keys() or
+                     t in self.mins]
+        min_tools = tools if restrict_tools else list(self.tools.keys())
+        s = self.values.loc(axis=1)[col]
+        mins = s[min_tools].min(axis=1).to_numpy()
+        is_min = s[tools].to_numpy(dtype=float) == mins[:, None]
+        if unique_only:
+            is_min &= (is_min.sum(axis=1) == 1)[:, None]
+        est, low, high = bootstrap_sums(is_min, samples, alpha, seed)
+        return ci_frame(est, low, high, tools)
+
+    @profiled
     def min_counts(self, tools=None, restrict_tools=False, unique_only=False, col='states',min_name='min(count)'):
         if tools is None:
             tools = list(self.tools.keys())
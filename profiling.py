@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+'''Opt-in phase-level profiling of ``LtlcrossRunner`` and the helpers in
+``experiments_lib``.
+
+Functions decorated by ``profiled`` and blocks in ``phase`` are recorded
+by the global ``PROFILER`` once it is enabled. When it is disabled, they
+cost a single attribute check. For each call the profiler records wall
+time, the enclosing phases, and the peak of memory allocated by Python
+during the phase (by ``tracemalloc``; memory of subprocesses such as
+ltlcross is not included).
+
+``tracemalloc`` is process-wide, so memory is recorded only for phases
+of the main thread (and includes allocations of other threads during
+the phase); phases in other threads, such as jobs of ``run_parallel``,
+have N/A peaks.
+
+>>> PROFILER.enable()
+>>> r.parse_results()
+>>> PROFILER.summary()
+>>> PROFILER.export('profile.json')              # chrome://tracing, Perfetto
+>>> PROFILER.export('profile.txt', 'collapsed')  # flamegraph.pl, speedscope
+'''
+import functools
+import json
+import math
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+import pandas as pd
+
+NULL_PHASE = nullcontext()
+
+class Frame(object):
+    def __init__(self, name):
+        self.name = name
+        self.children = 0.0
+        self.peak = 0
+
+class Profiler(object):
+    """Collects records ``(name, stack, start, duration, self_time,
+    peak_kb, thread)`` of profiled phases.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.records = []
+        self.local = threading.local()
+        self.origin = time.perf_counter()
+
+    def enable(self, memory=True):
+        """Starts recording, with memory peaks if ``memory``."""
+        self.memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def reset(self):
+        self.records = []
+        self.origin = time.perf_counter()
+
+    def stack(self):
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    def phase(self, name):
+        """Returns a context manager that records the phase ``name``."""
+        if not self.enabled:
+            return NULL_PHASE
+        return self.record(name)
+
+    @contextmanager
+    def record(self, name):
+        stack = self.stack()
+        frame = Frame(name)
+        memory = self.memory and \
+                 threading.current_thread() is threading.main_thread()
+        if memory:
+            base, outer_peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, outer_peak)
+            tracemalloc.reset_peak()
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            peak_kb = float('nan')
+            if memory:
+                peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+                peak_kb = max(peak - base, 0) / 1024
+                if stack:
+                    stack[-1].peak = max(stack[-1].peak, peak)
+            if stack:
+                stack[-1].children += duration
+            self.records.append((name, tuple(f.name for f in stack) + (name,),
+                                 start - self.origin, duration,
+                                 duration - frame.children, peak_kb,
+                                 threading.get_ident()))
+
+    def frame(self):
+        """Returns all records as a DataFrame."""
+        return pd.DataFrame(self.records, columns=['phase', 'stack', 'start',
+                            'wall', 'self', 'peak_kb', 'thread'])
+
+    def summary(self):
+        """Returns a table with number of calls, total, mean, and self
+        wall time (in seconds), and peak memory (in MB) for each phase.
+        """
+        df = self.frame()
+        # ``self`` cannot be a keyword of ``agg``
+        res = df.groupby('phase').agg(calls=('wall', 'size'),
+                                      wall=('wall', 'sum'),
+                                      mean=('wall', 'mean'),
+                                      self_time=('self', 'sum'),
+                                      peak_mb=('peak_kb', 'max'))
+        res['peak_mb'] /= 1024
+        return res.sort_values('wall', ascending=False)
+
+    def export(self, path, fmt='chrome'):
+        """Exports the records to ``path`` in one of the formats
+
+         * ``chrome``    -- Trace Event JSON (chrome://tracing, Perfetto,
+           speedscope)
+         * ``collapsed`` -- folded stacks with self time in microseconds
+           (flamegraph.pl, speedscope)
+        """
+        if fmt == 'chrome':
+            events = [{'name' : name, 'ph' : 'X', 'pid' : os.getpid(),
+                       'tid' : thread, 'ts' : start * 1e6, 'dur' : wall * 1e6,
+                       'args' : {} if math.isnan(peak_kb)
+                                else {'peak_kb' : peak_kb}}
+                      for name, _, start, wall, _, peak_kb, thread
+                      in self.records]
+            with open(path, 'w') as f:
+                json.dump({'traceEvents' : events}, f)
+        elif fmt == 'collapsed':
+            folded = {}
+            for _, stack, _, _, self_time, _, _ in self.records:
+                key = ';'.join(stack)
+                folded[key] = folded.get(key, 0) + self_time
+            with open(path, 'w') as f:
+                for key, value in folded.items():
+                    print('{} {}'.format(key, int(value * 1e6)), file=f)
+        else:
+            raise ValueError(fmt)
+
+PROFILER = Profiler()
+
+def phase(name):
+    """Context manager that records phase ``name`` in ``PROFILER``."""
+    return PROFILER.phase(name)
+
+def profiled(func):
+    """Decorator that records each call of ``func`` as a phase."""
+    name = func.__qualname__
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not PROFILER.enabled:
+            return func(*args, **kwargs)
+        with PROFILER.record(name):
+            return func(*args, **kwargs)
+    return wrapper
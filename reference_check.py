@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+'''Checks automata produced by the tools against one trusted reference
+translation per formula. This is linear in the number of tools, unlike
+the all-pairs cross-checks of ``ltlcross``.
+
+An automaton ``P`` for formula ``f`` is flawed if ``P*Nref`` is nonempty
+(it accepts a word of ``!f``) or if ``Comp(P)*Pref`` is nonempty (it
+rejects a word of ``f``). Verdicts are cached by the formula, the
+reference and a hash of the automaton, so automata that did not change
+are never checked again. Spot's ``translate`` serves as the reference
+for formulas where the reference tool produced no automaton.
+'''
+import hashlib
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+def spot_reference():
+    """Returns the cache key of Spot's ``translate`` as the reference.
+    It includes Spot's version as Spot is often one of the tested tools.
+    """
+    import spot
+    return 'spot-{}'.format(spot.version())
+
+def aut_hash(hoa):
+    """Returns a hex digest that identifies the HOA string ``hoa``.
+    """
+    return hashlib.sha1(hoa.encode('utf-8')).hexdigest()
+
+def is_missing(aut):
+    return aut is None or (isinstance(aut, float) and math.isnan(aut))
+
+def load_verdicts(cache_file):
+    """Returns a dict ``(formula, reference, aut_hash)``->``verdict``
+    stored in ``cache_file``. An empty verdict means a correct automaton.
+    """
+    if cache_file is None or not os.path.isfile(cache_file):
+        return {}
+    cache = pd.read_csv(cache_file, dtype=str, keep_default_na=False)
+    return {(f, r, h) : v for f, r, h, v in
+            zip(cache.formula, cache.reference, cache.aut_hash, cache.verdict)}
+
+def store_verdicts(cache_file, verdicts):
+    """Appends ``verdicts`` (a dict as returned by ``load_verdicts``)
+    to ``cache_file``.
+    """
+    if cache_file is None or not verdicts:
+        return
+    keys = list(verdicts.keys())
+    df = pd.DataFrame({
+        'formula'   : [k[0] for k in keys],
+        'reference' : [k[1] for k in keys],
+        'aut_hash'  : [k[2] for k in keys],
+        'verdict'   : [verdicts[k] for k in keys],
+    })
+    df.to_csv(cache_file, mode='a', index=False,
+              header=not os.path.isfile(cache_file))
+
+def check_formula(task):
+    """Checks all automata for one formula against the reference.
+    Runs in a worker process.
+
+    Parameters
+    ----------
+    task : a triple ``(formula, ref_hoa, hoas)``
+        If ``ref_hoa`` is ``None``, the reference automata are built by
+        ``spot.translate`` for the formula and its negation. Otherwise
+        ``ref_hoa`` is the reference automaton and its complement is
+        used for the negation.
+
+    Returns a list of verdicts, one for each automaton in ``hoas``.
+    """
+    import spot
+    formula, ref_hoa, hoas = task
+    f = spot.formula(formula)
+    if ref_hoa is None:
+        pos = spot.translate(f)
+        neg = spot.translate(spot.formula.Not(f))
+    else:
+        pos = spot.automaton(ref_hoa + '\n')
+        neg = spot.complement(pos)
+    verdicts = []
+    for hoa in hoas:
+        aut = spot.automaton(hoa + '\n')
+        errors = []
+        if aut.intersects(neg):
+            errors.append('Nref')
+        if spot.complement(aut).intersects(pos):
+            errors.append('Pref')
+        verdicts.append(';'.join(errors))
+    return verdicts
+
+def check_automata(automata, formulas, reference=None,
+                   processes=None, cache_file=None):
+    """Checks automata against a reference translation in parallel.
+
+    Parameters
+    ----------
+    automata : DataFrame
+        HOA strings indexed by ``form_id`` with tools as columns (as
+        ``LtlcrossRunner.automata``)
+    formulas : dict or Series ``form_id``->``formula``
+    reference : String, default ``None``
+        column of ``automata`` used as the reference, ``None`` means
+        that Spot's ``translate`` is used; it is also used for formulas
+        without a reference automaton
+    processes : int, default ``None``
+        number of worker processes (``None`` means number of CPUs)
+    cache_file : String, default ``None``
+        file used to cache verdicts
+
+    Returns a DataFrame of verdicts with the same shape as ``automata``.
+    The verdict is ``''`` for correct automata, ``'Nref'``, ``'Pref'``
+    or ``'Nref;Pref'`` for flawed ones, and N/A where no automaton exists.
+    """
+    cache = load_verdicts(cache_file)
+    spot_key = spot_reference()
+    tools = [t for t in automata.columns if t != reference]
+    res = pd.DataFrame(index=automata.index, columns=tools, dtype=object)
+
+    tasks, todo = [], []
+    for form_id in automata.index:
+        formula = formulas[form_id]
+        ref_hoa, ref_key = None, spot_key
+        if reference is not None:
+            hoa = automata.loc[form_id, reference]
+            if not is_missing(hoa):
+                ref_hoa, ref_key = hoa, aut_hash(hoa)
+        hoas, cells = [], []
+        for tool in tools:
+            hoa = automata.loc[form_id, tool]
+            if is_missing(hoa):
+                continue
+            key = (formula, ref_key, aut_hash(hoa))
+            if key in cache:
+                res.loc[form_id, tool] = cache[key]
+            else:
+                hoas.append(hoa)
+                cells.append((form_id, tool, key))
+        if hoas:
+            tasks.append((formula, ref_hoa, hoas))
+            todo.append(cells)
+
+    new = {}
+    with ProcessPoolExecutor(processes) as pool:
+        for cells, verdicts in zip(todo, pool.map(check_formula, tasks)):
+            for (form_id, tool, key), verdict in zip(cells, verdicts):
+                res.loc[form_id, tool] = verdict
+                new[key] = verdict
+    store_verdicts(cache_file, new)
+    return res
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+'''A catalog of results of many ``LtlcrossRunner``s (datasets) that can be
+queried as one table. Parsed results are cached on disk and the cache
+is invalidated when the size, modification time and content hash of the
+.csv file (or of its overlay of incorrect automata) change.
+
+>>> cat = ResultCatalog()
+>>> cat.add_dir('data', get_tools('full'), cols)
+>>> cat.aggregate('states', by=['dataset','main'])
+'''
+import glob
+import hashlib
+import os
+import pandas as pd
+from ltlcross_runner import LtlcrossRunner, incorrect_overlay
+
+PARSED = ['values', 'exit_status', 'incorrect', 'form', 'automata',
+          'aut_hashed']
+# Bump when PARSED changes to invalidate old caches
+CACHE_FORMAT = 2
+HIERARCHY = ['main', 'interm', 'acc']
+
+def file_hash(path, block=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(block), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def sources_of(runner):
+    """Returns files whose content determines the parsed results."""
+    return [p for p in [runner.res_file, incorrect_overlay(runner.res_file)]
+            if os.path.isfile(p)]
+
+def signature(paths):
+    return [(p, os.path.getsize(p), os.stat(p).st_mtime_ns) for p in paths]
+
+def cache_path(runner, cache_dir):
+    key = '{}|{}|{}'.format(CACHE_FORMAT, os.path.abspath(runner.res_file),
+                            ','.join(runner.cols))
+    name = hashlib.sha1(key.encode('utf-8')).hexdigest() + '.pkl'
+    return os.path.join(cache_dir, name)
+
+def load_parsed(runner, cache_dir='.results_cache'):
+    """Calls ``runner.parse_results()`` unless valid parsed results are
+    stored in ``cache_dir``. In that case the cached results are set to
+    the runner instead.
+
+    The cache is valid if the size and modification time of all source
+    files match. If only the modification times changed, content hashes
+    are compared before the results are parsed again.
+    """
+    path = cache_path(runner, cache_dir)
+    sources = sources_of(runner)
+    sig = signature(sources)
+    cached = pd.read_pickle(path) if os.path.isfile(path) else None
+    if cached is not None and cached['signature'] != sig:
+        # Files of other sizes certainly changed, do not read them twice
+        same_sizes = [s[:2] for s in cached['signature']] == \
+                     [s[:2] for s in sig]
+        if same_sizes and cached['hashes'] == [file_hash(p) for p in sources]:
+            cached['signature'] = sig
+            pd.to_pickle(cached, path)
+        else:
+            cached = None
+    if cached is not None:
+        for attr in PARSED:
+            setattr(runner, attr, cached[attr])
+        return runner
+
+    runner.parse_results()
+    cached = {attr : getattr(runner, attr) for attr in PARSED}
+    cached['signature'] = sig
+    cached['hashes'] = [file_hash(p) for p in sources]
+    os.makedirs(cache_dir, exist_ok=True)
+    pd.to_pickle(cached, path)
+    return runner
+
+def split_tool(tool, symbol='/'):
+    """Splits tool name into ``(main, interm, acc)`` as ``split_cols``
+    does, using ``---`` for empty parts.
+    """
+    parts = tool.split(symbol)
+    parts += [''] * (len(HIERARCHY) - len(parts))
+    return tuple(p if p != '' else '---' for p in parts[:len(HIERARCHY)])
+
+def long_table(runner):
+    """Returns results of ``runner`` as a long table indexed by
+    ``form_id``, ``formula``, ``main``, ``interm``, and ``acc`` with
+    followed columns, ``exit_status`` and ``incorrect`` as columns.
+    """
+    values = runner.values.stack('tool')
+    status = runner.exit_status.stack().rename('exit_status')
+    incorrect = runner.incorrect.stack().rename('incorrect')
+    table = values.join(status, how='outer').join(incorrect, how='left')
+    tools = table.index.get_level_values('tool')
+    hier = pd.MultiIndex.from_tuples([split_tool(t) for t in tools],
+                                     names=HIERARCHY)
+    idx = table.index.droplevel('tool')
+    table.index = pd.MultiIndex.from_arrays(
+        [idx.get_level_values(l) for l in idx.names] +
+        [hier.get_level_values(l) for l in HIERARCHY],
+        names=list(idx.names) + HIERARCHY)
+    return table
+
+class ResultCatalog(object):
+    """A collection of named datasets (runners). Results are parsed and
+    reshaped only when a dataset is queried for the first time.
+
+    Parameters
+    ----------
+    cache_dir : String, default ``'.results_cache'``
+        directory that stores parsed results
+    """
+    def __init__(self, cache_dir='.results_cache'):
+        self.cache_dir = cache_dir
+        self.runners = {}
+        self.tables = {}
+
+    def add(self, name, runner):
+        """Registers ``runner`` as dataset ``name``."""
+        self.runners[name] = runner
+        self.tables.pop(name, None)
+
+    def add_dir(self, data_dir, tools, cols, prefix=None):
+        """Registers all .csv result files in ``data_dir`` as datasets
+        named ``prefix/basename`` (``prefix`` defaults to ``data_dir``).
+        """
+        if prefix is None:
+            prefix = data_dir.rstrip('/')
+        for res_file in sorted(glob.glob(os.path.join(data_dir, '*.csv'))):
+            base = os.path.basename(res_file)[:-4]
+            if base.endswith('_incorrect') or base.endswith('_verdicts'):
+                continue
+            self.add('{}/{}'.format(prefix, base),
+                     LtlcrossRunner(tools, res_filename=res_file, cols=cols))
+
+    def runner(self, name):
+        """Returns the runner of dataset ``name`` with parsed results."""
+        r = self.runners[name]
+        if r.values is None:
+            load_parsed(r, self.cache_dir)
+        return r
+
+    def table(self, datasets=None):
+        """Returns one long table for ``datasets`` (all by default) with
+        ``dataset`` as the outermost index level.
+        """
+        if datasets is None:
+            datasets = list(self.runners.keys())
+        for name in datasets:
+            if name not in self.tables:
+                self.tables[name] = long_table(self.runner(name))
+        return pd.concat([self.tables[n] for n in datasets],
+                         keys=datasets, names=['dataset'])
+
+    def aggregate(self, col='states', by=['dataset', 'main'],
+                  func='sum', datasets=None, ok_only=True):
+        """Groups the table by index levels ``by`` and aggregates ``col``
+        by ``func``. If ``ok_only`` is ``True``, only results with
+        ``exit_status`` ``ok`` are considered.
+        """
+        t = self.table(datasets)
+        if ok_only:
+            t = t[t.exit_status == 'ok']
+        return t.groupby(level=by)[col].agg(func)
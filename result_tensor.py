@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+'''Dense formula x tool x metric storage of ltlcross results.
+
+The results are loaded without any merge or pivot: formulas and tools
+are factorized to integer codes and the values are scattered directly
+into NumPy arrays
+
+ * ``metrics``   -- float32 array of shape (formulas, metrics, tools),
+   N/A for missing values
+ * ``status``    -- int8 codes of ``exit_status`` of shape
+   (formulas, tools), -1 for missing values
+ * ``incorrect`` -- bool array of shape (formulas, tools)
+
+``values``, ``exit_status`` and ``incorrect`` return DataFrames with the
+same layout as ``LtlcrossRunner`` uses. The ``values`` frame is a view
+of ``metrics``, so no copy of the data is made.
+'''
+import numpy as np
+import pandas as pd
+from experiments_lib import pretty_print
+from tool_wrapper import memout_status
+
+class ResultTensor(object):
+    def __init__(self, formulas, tools, cols, metrics, status, statuses,
+                 incorrect):
+        self.formulas = formulas
+        self.tools = tools
+        self.cols = cols
+        self.metrics = metrics
+        self.status = status
+        self.statuses = statuses
+        self.incorrect_arr = incorrect
+        self.index = pd.MultiIndex.from_arrays(
+            [np.arange(len(formulas)), formulas], names=['form_id', 'formula'])
+
+    @classmethod
+    def from_csv(cls, res_file, cols, marked=None):
+        """Loads followed columns ``cols`` from ltlcross results in
+        ``res_file``. Automata are not loaded.
+
+        Parameters
+        ----------
+        res_file : String
+        cols : list of Strings
+            followed columns (metrics)
+        marked : set of ``(formula, tool)``, default ``None``
+            automata to mark as incorrect (see ``read_incorrect_overlay``)
+        """
+        header = pd.read_csv(res_file, nrows=0).columns
+        cols = sorted(cols)
+        usecols = ['formula', 'tool', 'exit_status'] + cols + \
+                  [c for c in ['exit_code', 'incorrect'] if c in header]
+        res = pd.read_csv(res_file, usecols=usecols,
+                          dtype={c : np.float32 for c in cols})
+
+        # Pretty-print each distinct formula only once
+        raw_codes, raw = pd.factorize(res['formula'])
+        pretty = pd.Index(raw).map(pretty_print)
+        pretty_codes, formulas = pd.factorize(pretty)
+        f_codes = pretty_codes[raw_codes]
+        t_codes, tools = pd.factorize(res['tool'], sort=True)
+
+        status = res['exit_status']
+        if 'exit_code' in res.columns:
+            status = memout_status(status, res.exit_code)
+        s_codes, statuses = pd.factorize(status)
+        statuses = list(statuses)
+
+        incorrect = res['incorrect'].to_numpy(dtype=bool) \
+                    if 'incorrect' in res.columns \
+                    else np.zeros(len(res), dtype=bool)
+        if marked:
+            keys = pd.MultiIndex.from_arrays([formulas[f_codes], res['tool']])
+            incorrect = incorrect | keys.isin(list(marked))
+
+        n_f, n_t, n_m = len(formulas), len(tools), len(cols)
+        metrics = np.full((n_f, n_m, n_t), np.nan, dtype=np.float32)
+        for m, col in enumerate(cols):
+            metrics[f_codes, m, t_codes] = res[col].to_numpy()
+        status_arr = np.full((n_f, n_t), -1, dtype=np.int8)
+        status_arr[f_codes, t_codes] = s_codes
+        incorrect_arr = np.zeros((n_f, n_t), dtype=bool)
+        incorrect_arr[f_codes, t_codes] = incorrect
+        return cls(np.asarray(formulas), list(tools), cols, metrics,
+                   status_arr, statuses, incorrect_arr)
+
+    def tool_index(self):
+        return pd.Index(self.tools, name='tool')
+
+    def values(self):
+        """Returns a view of ``metrics`` with columns ``(column, tool)``."""
+        n_f, n_m, n_t = self.metrics.shape
+        columns = pd.MultiIndex.from_product([self.cols, self.tools],
+                                             names=['column', 'tool'])
+        return pd.DataFrame(self.metrics.reshape(n_f, n_m * n_t),
+                            index=self.index, columns=columns, copy=False)
+
+    def exit_status(self):
+        """Returns ``exit_status`` decoded from ``status`` as strings (an
+        object frame that ``na_incorrect`` can update).
+        """
+        # Code -1 (missing) selects the trailing N/A
+        labels = np.array(self.statuses + [np.nan], dtype=object)
+        return pd.DataFrame(labels[self.status], index=self.index,
+                            columns=self.tool_index())
+
+    def incorrect(self):
+        """Returns a view of ``incorrect_arr`` with tools as columns."""
+        return pd.DataFrame(self.incorrect_arr, index=self.index,
+                            columns=self.tool_index(), copy=False)
+
+    def metric(self, col):
+        """Returns a (formulas, tools) view of metric ``col``."""
+        return self.metrics[:, self.cols.index(col), :]
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+'''Differences between two runs of ``LtlcrossRunner`` (typically of two
+versions of the same tool).
+
+Formulas are aligned by their pretty-printed form through a hash index,
+so the order and ids of formulas in the two runs do not matter. All
+comparisons are done on NumPy arrays of the aligned (formula, tool)
+pairs.
+
+>>> d = diff_runs(old, new, tool_map={'R3//TGR' : 'R3.1//TGR'})
+>>> diff_summary(d)
+'''
+import numpy as np
+import pandas as pd
+
+# Changes of time are reported if larger than 1 s and 50 %
+DEFAULT_THRESHOLDS = {'time' : (1.0, 0.5)}
+
+def align_formulas(old, new):
+    """Returns arrays ``(old_ids, new_ids)`` of positions of formulas
+    present in both runners.
+    """
+    old_f = old.values.index.get_level_values('formula')
+    new_f = new.values.index.get_level_values('formula')
+    pos = pd.Index(new_f).get_indexer(old_f)
+    old_ids = np.nonzero(pos >= 0)[0]
+    return old_ids, pos[old_ids]
+
+def diff_runs(old, new, cols=None, tool_map=None, thresholds=None,
+              include_unchanged=False):
+    """Compares results of two runners and returns a DataFrame with one
+    row per changed (formula, tool) pair.
+
+    Parameters
+    ----------
+    old, new : LtlcrossRunner
+        runners with parsed results
+    cols : list of Strings, default followed columns parsed in both
+    tool_map : a dict (String -> String), default ``None``
+        maps tools of ``old`` to tools of ``new``; tools with the same
+        name are compared by default
+    thresholds : a dict (String -> (float, float)), default ``None``
+        ``col``->``(abs, rel)``: a change of ``col`` is reported only if
+        it is larger than ``abs`` and than ``rel`` times the old value.
+        Columns not listed report any change. Updates
+        ``DEFAULT_THRESHOLDS``.
+    include_unchanged : Boolean, default ``False``
+        if ``True``, all aligned pairs are returned
+
+    The result has columns ``formula``, ``old_id``, ``new_id``,
+    ``old_tool``, ``new_tool``, ``<col>_old``, ``<col>_new``,
+    ``<col>_delta``, and ``<col>_changed`` for each column, and
+    ``exit_status_old``, ``exit_status_new``, and ``exit_status_changed``.
+    """
+    if tool_map is None:
+        tool_map = {t : t for t in old.tools if t in new.tools}
+    if cols is None:
+        cols = [c for c in old.cols if c in new.cols
+                and c in old.values and c in new.values]
+    thr = dict(DEFAULT_THRESHOLDS)
+    if thresholds is not None:
+        thr.update(thresholds)
+    old_tools = list(tool_map.keys())
+    new_tools = [tool_map[t] for t in old_tools]
+    old_ids, new_ids = align_formulas(old, new)
+    n_f, n_t = len(old_ids), len(old_tools)
+
+    res = {
+        'formula'  : np.repeat(old.values.index.get_level_values('formula')
+                               [old_ids], n_t),
+        'old_id'   : np.repeat(old_ids, n_t),
+        'new_id'   : np.repeat(new_ids, n_t),
+        'old_tool' : np.tile(old_tools, n_f),
+        'new_tool' : np.tile(new_tools, n_f),
+    }
+    any_changed = np.zeros(n_f * n_t, dtype=bool)
+    for col in cols:
+        a = old.values[col][old_tools].to_numpy(dtype=float)[old_ids].ravel()
+        b = new.values[col][new_tools].to_numpy(dtype=float)[new_ids].ravel()
+        delta = b - a
+        abs_thr, rel_thr = thr.get(col, (0, 0))
+        changed = (np.abs(delta) > np.maximum(abs_thr, rel_thr * np.abs(a))) \
+                  | (np.isnan(a) != np.isnan(b))
+        res[col + '_old'] = a
+        res[col + '_new'] = b
+        res[col + '_delta'] = delta
+        res[col + '_changed'] = changed
+        any_changed |= changed
+
+    a = old.exit_status[old_tools].to_numpy(dtype=object)[old_ids].ravel()
+    b = new.exit_status[new_tools].to_numpy(dtype=object)[new_ids].ravel()
+    changed = (a != b) & ~(pd.isnull(a) & pd.isnull(b))
+    res['exit_status_old'] = a
+    res['exit_status_new'] = b
+    res['exit_status_changed'] = changed
+    any_changed |= changed
+
+    res = pd.DataFrame(res)
+    if not include_unchanged:
+        res = res[any_changed].reset_index(drop=True)
+    return res
+
+def diff_summary(diff):
+    """Returns the number of changes of each column for each tool pair
+    in ``diff`` (as returned by ``diff_runs``).
+    """
+    changed = [c for c in diff.columns if c.endswith('_changed')]
+    res = diff.groupby(['old_tool', 'new_tool'])[changed].sum()
+    res.columns = [c[:-len('_changed')] for c in changed]
+    return res
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+'''Cost model and longest-job-first scheduling of (formula, tool) jobs
+for parallel runs of ``LtlcrossRunner``.
+
+The expected cost of a job is taken from earlier result files (``time``
+of the formula, ``timeout`` for pairs that timed out).
+Pairs without history are estimated from the size of the formula and
+the median time per formula node of the tool (or of all tools).
+'''
+import heapq
+import os
+import pandas as pd
+import spot
+from experiments_lib import pretty_print
+
+def read_formulas(f_files):
+    """Returns the list of formulas in ``f_files`` in the order in which
+    ``ltlcross -F`` reads them (empty lines and comments are skipped).
+    """
+    formulas = []
+    for f_file in f_files:
+        with open(f_file, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    formulas.append(line)
+    return formulas
+
+def formula_size(form):
+    return spot.length(spot.formula(form))
+
+class CostModel(object):
+    """Estimates running time of ``ltlcross`` on a formula and a tool.
+
+    Parameters
+    ----------
+    history : list of Strings
+        result .csv files of earlier runs (missing files are ignored)
+    timeout : float
+        cost of pairs that timed out in history; ``None`` (no timeout)
+        means the longest time in history
+    """
+    def __init__(self, history=[], timeout=300):
+        self.timeout = None if timeout is None else float(timeout)
+        self.known = {}
+        self.rates = {}
+        self.rate = 1.0
+        frames = [pd.read_csv(f, usecols=['formula','tool','exit_status','time'])
+                  for f in history if os.path.isfile(f)]
+        if not frames:
+            return
+        hist = pd.concat(frames)
+        forms = hist.formula.drop_duplicates()
+        pretty = dict(zip(forms, forms.map(pretty_print)))
+        hist['formula'] = hist.formula.map(pretty)
+        timeout = self.timeout
+        if timeout is None:
+            timeout = hist.time[hist.exit_status == 'ok'].max()
+        hist.loc[hist.exit_status == 'timeout', 'time'] = timeout
+        hist = hist.dropna(subset=['time'])
+        cost = hist.groupby(['formula','tool']).time.mean()
+        self.known = cost.to_dict()
+
+        sizes = {f : formula_size(f) for f in hist.formula.unique()}
+        hist['rate'] = hist.time / hist.formula.map(sizes).clip(lower=1)
+        self.rates = hist.groupby('tool').rate.median().to_dict()
+        self.rate = hist.rate.median()
+
+    def estimate(self, form, tool):
+        """Expected time of ``tool`` on ``form`` (pretty-printed)."""
+        if (form, tool) in self.known:
+            return self.known[(form, tool)]
+        rate = self.rates.get(tool, self.rate)
+        if self.timeout is None:
+            return rate * formula_size(form)
+        return min(rate * formula_size(form), self.timeout)
+
+    def job_cost(self, form, tool):
+        """Expected time of a job that runs ``tool`` on ``form``. Jobs
+        run ltlcross without checks, so negations are not translated.
+        """
+        return self.estimate(pretty_print(form), tool)
+
+def makespan(costs, workers):
+    """Returns the makespan of list scheduling of jobs with ``costs``
+    (in the given order) on ``workers`` workers.
+    """
+    finish = [0.0] * workers
+    for c in costs:
+        heapq.heapreplace(finish, finish[0] + c)
+    return max(finish)
+
+def longest_first(jobs, costs):
+    """Returns ``jobs`` sorted by decreasing ``costs`` (stable)."""
+    order = sorted(range(len(jobs)), key=lambda i: -costs[i])
+    return [jobs[i] for i in order], [costs[i] for i in order]
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+'''In-process execution of tools that are Spot itself.
+
+Commands of the shapes
+
+    ltl2tgba [-B] [-D] [-G] [-S] [-C] [-H] -f %f [> %O]
+    ltl2tgba ... -f %f | autfilt [-D] [-G] [-B] [-S] [-C] [-H] [--sbacc] [> %O]
+
+are recognised by ``fast_plan`` and run through ``spot.translate`` and
+``spot.postprocess`` by ``run_plan`` in a separate process (see
+``run_killable``). ``run_plan`` returns a row of ltlcross statistics, so
+the results can be merged with results of ltlcross.
+
+The measured time covers only ``translate`` and ``postprocess``, while
+ltlcross also measures the start of the tool, parsing, and printing of
+the automaton. It is therefore returned as ``time_inproc`` and not as
+``time``.
+'''
+import multiprocessing
+import re
+import time
+
+# Processes are forked from a single-threaded server with Spot loaded;
+# forking the threads of run_parallel directly could deadlock
+CONTEXT = multiprocessing.get_context('forkserver')
+CONTEXT.set_forkserver_preload(['spot', 'spot_fastpath'])
+
+CMD = re.compile(r'^ltl2tgba(?P<trans>(\s+-[A-Za-z]+)*)\s+-f\s+%f'
+                 r'(\s*\|\s*autfilt(?P<post>(\s+--?[A-Za-z]+)*))?'
+                 r'(\s*>\s*%O)?\s*$')
+
+# Short options of ltl2tgba/autfilt and the corresponding preferences
+SHORT_OPTS = {
+    'B' : ['BA'],
+    'D' : ['deterministic'],
+    'G' : ['generic'],
+    'S' : ['sbacc'],
+    'C' : ['complete'],
+    'H' : [],
+}
+
+def options(opts):
+    """Returns the list of preferences for options ``opts`` or ``None``
+    if some option is not supported.
+    """
+    prefs = []
+    for opt in opts.split():
+        if opt == '--sbacc':
+            prefs.append('sbacc')
+            continue
+        if opt.startswith('--'):
+            return None
+        for letter in opt[1:]:
+            if letter not in SHORT_OPTS:
+                return None
+            prefs += SHORT_OPTS[letter]
+    return prefs
+
+def fast_plan(cmd):
+    """Returns a plan (a dict with preferences for ``translate`` and a
+    list of post-processing steps) for ``cmd`` if it can be run
+    in-process, ``None`` otherwise.
+    """
+    m = CMD.match(cmd.strip())
+    if m is None:
+        return None
+    trans = options(m.group('trans') or '')
+    if trans is None:
+        return None
+    plan = {'translate' : trans, 'post' : []}
+    if m.group('post') is not None:
+        post = options(m.group('post'))
+        if post is None:
+            return None
+        if post == ['sbacc']:
+            plan['post'].append('sbacc')
+        else:
+            plan['post'].append(post)
+    return plan
+
+def aut_stats(aut):
+    """Computes statistics of ``aut`` with ltlcross's column names."""
+    import spot
+    sub = spot.sub_stats_reachable(aut)
+    terminal = spot.is_terminal_automaton(aut)
+    weak = spot.is_weak_automaton(aut)
+    # SCCs are classified in the same way as by ltlcross
+    si = spot.scc_info(aut)
+    si.determine_unknown_acceptance()
+    sccs = {'nonacc_scc' : 0, 'terminal_scc' : 0,
+            'weak_scc' : 0, 'strong_scc' : 0}
+    for n in range(si.scc_count()):
+        if si.is_rejecting_scc(n):
+            sccs['nonacc_scc'] += 1
+        elif spot.is_terminal_scc(si, n):
+            sccs['terminal_scc'] += 1
+        elif spot.is_weak_scc(si, n):
+            sccs['weak_scc'] += 1
+        else:
+            sccs['strong_scc'] += 1
+    return {
+        'states'        : aut.num_states(),
+        'edges'         : aut.num_edges(),
+        'transitions'   : sub.transitions,
+        'acc'           : aut.num_sets(),
+        'scc'           : si.scc_count(),
+        'nonacc_scc'    : sccs['nonacc_scc'],
+        'terminal_scc'  : sccs['terminal_scc'],
+        'weak_scc'      : sccs['weak_scc'],
+        'strong_scc'    : sccs['strong_scc'],
+        'nondet_states' : spot.count_nondet_states(aut),
+        'nondet_aut'    : int(not spot.is_deterministic(aut)),
+        'terminal_aut'  : int(terminal),
+        'weak_aut'      : int(weak and not terminal),
+        'strong_aut'    : int(not weak),
+        'ambiguous_aut' : int(not spot.is_unambiguous(aut)),
+        'complete_aut'  : int(spot.is_complete(aut)),
+    }
+
+def run_plan(form, plan, automata=True):
+    """Translates ``form`` according to ``plan`` and returns a dict
+    with ``exit_status``, ``exit_code``, ``time_inproc``, statistics, and
+    (if ``automata``) the automaton in HOA.
+    """
+    import spot
+    f = spot.formula(form)
+    start = time.perf_counter()
+    aut = spot.translate(f, *plan['translate'])
+    for step in plan['post']:
+        if step == 'sbacc':
+            aut = spot.sbacc(aut)
+        else:
+            aut = spot.postprocess(aut, *step)
+    elapsed = time.perf_counter() - start
+    aut.set_name(str(f))
+    row = {'exit_status' : 'ok', 'exit_code' : 0, 'time_inproc' : elapsed}
+    row.update(aut_stats(aut))
+    if automata:
+        row['automaton'] = aut.to_str('hoa')
+    return row
+
+def plan_worker(conn, form, plan, automata):
+    conn.send(run_plan(form, plan, automata))
+    conn.close()
+
+def run_killable(form, plan, automata=True, timeout=300):
+    """Runs ``run_plan`` in a new process (see ``CONTEXT``) that is
+    killed after ``timeout`` seconds (``None`` means no timeout). Raises
+    ``TimeoutError`` on a timeout and ``RuntimeError`` if the process
+    fails.
+    """
+    recv, send = CONTEXT.Pipe(duplex=False)
+    proc = CONTEXT.Process(target=plan_worker,
+                           args=(send, form, plan, automata))
+    proc.start()
+    send.close()
+    try:
+        if not recv.poll(timeout):
+            raise TimeoutError(form)
+        try:
+            return recv.recv()
+        except EOFError:
+            raise RuntimeError('in-process translation of {} failed'
+                               .format(form))
+    finally:
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+        recv.close()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''Runs a tool command for ltlcross and enforces memory limits on the
+whole process tree of the command (pipeline children included).
+
+run with
+$ python3 tool_wrapper.py [--mem-limit MB] [--total-limit MB --root PID] -- "CMD"
+
+The command is executed by ``/bin/sh -c``. If the resident memory of its
+process tree exceeds ``--mem-limit``, the tree is killed and the wrapper
+exits with ``MEMOUT_CODE``. The same happens if the memory of all
+processes under ``--root`` exceeds ``--total-limit`` and this tree is
+the largest wrapped tree under the root. Otherwise the exit code (or
+the signal) of the command is passed to ltlcross. The wrapper adds the
+startup of the interpreter (some 30-60 ms) to the time measured by
+ltlcross, so ``LtlcrossRunner`` wraps either all tools or none.
+
+With ``--stages``, the wrapper measures the stages of a pipeline
+$ python3 tool_wrapper.py --stages --tool NAME --formula %f -- "A" "B > %O"
+runs ``A`` and then ``B`` with the output of ``A`` as input, and appends
+the running time of each stage and the number of states of each
+intermediate automaton to the JSONL file named by ``$LTLCROSS_STAGES``.
+Commands that call a translator internally (such as ``ltl2dstar -t``)
+can run it through ``tool_wrapper.py --inner -- CMD ARGS...``; the time
+spent in the inner command (including the startup of the inner wrapper)
+then forms the first stage.
+'''
+import argparse
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+MEMOUT_CODE = 86
+PAGE_KB = os.sysconf('SC_PAGE_SIZE') // 1024
+STAGES_ENV = 'LTLCROSS_STAGES'
+INNER_ENV = 'TOOL_WRAPPER_INNER'
+HOA_STATES = re.compile(rb'^States: (\d+)', re.M)
+
+def memout_status(status, exit_code):
+    """Returns ``status`` (``exit_status`` of ltlcross) with ``memout``
+    for translations killed by the wrapper. ``status`` and ``exit_code``
+    are either scalars or pandas Series.
+    """
+    memout = (status == 'exit code') & (exit_code == MEMOUT_CODE)
+    if hasattr(status, 'mask'):
+        return status.mask(memout, 'memout')
+    return 'memout' if memout else status
+
+def children_map():
+    """Returns a dict ``pid``->``list of child pids`` from ``/proc``."""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open('/proc/{}/stat'.format(entry), 'r') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name can contain spaces; ppid follows the state
+        ppid = int(stat[stat.rfind(')')+2:].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+def process_tree(pid, children):
+    tree = [pid]
+    i = 0
+    while i < len(tree):
+        tree.extend(children.get(tree[i], []))
+        i += 1
+    return tree
+
+def rss_kb(pid):
+    try:
+        with open('/proc/{}/statm'.format(pid), 'r') as f:
+            return int(f.read().split()[1]) * PAGE_KB
+    except (OSError, IndexError, ValueError):
+        return 0
+
+def tree_rss_kb(pid, children):
+    return sum(rss_kb(p) for p in process_tree(pid, children))
+
+def is_wrapper(pid):
+    try:
+        with open('/proc/{}/cmdline'.format(pid), 'rb') as f:
+            cmdline = f.read()
+    except OSError:
+        return False
+    # Inner wrappers are a part of the tree of their outer wrapper
+    return b'tool_wrapper.py' in cmdline and b'--inner' not in cmdline
+
+def largest_wrapper(root, children):
+    """Returns pid of the wrapper with the largest tree under ``root``."""
+    sizes = {p : tree_rss_kb(p, children)
+             for p in process_tree(root, children) if is_wrapper(p)}
+    return max(sizes, key=sizes.get) if sizes else None
+
+def kill_tree(pid, children):
+    for p in reversed(process_tree(pid, children)):
+        try:
+            os.kill(p, signal.SIGKILL)
+        except OSError:
+            pass
+
+def breached(proc, opts):
+    if opts.mem_limit is None and opts.total_limit is None:
+        return None
+    children = children_map()
+    if opts.mem_limit is not None and \
+       tree_rss_kb(proc.pid, children) > opts.mem_limit * 1024:
+        return children
+    if opts.total_limit is not None and \
+       tree_rss_kb(opts.root, children) > opts.total_limit * 1024 and \
+       largest_wrapper(opts.root, children) == os.getpid():
+        return children
+    return None
+
+def hoa_states(data):
+    """Returns the number of states of the first HOA automaton in
+    ``data`` (bytes), ``None`` for other formats.
+    """
+    m = HOA_STATES.search(data)
+    return int(m.group(1)) if m else None
+
+def watch(proc, opts):
+    """Waits for ``proc`` while enforcing the memory limits and returns
+    its returncode. Exits with ``MEMOUT_CODE`` on a breach.
+    """
+    while True:
+        try:
+            return proc.wait(timeout=opts.interval)
+        except subprocess.TimeoutExpired:
+            pass
+        children = breached(proc, opts)
+        if children is not None:
+            kill_tree(proc.pid, children)
+            proc.wait()
+            print('tool_wrapper: memory limit exceeded', file=sys.stderr)
+            sys.exit(MEMOUT_CODE)
+
+def exit_as(returncode):
+    if returncode < 0:
+        # Report the signal to ltlcross as if the tool was not wrapped
+        sig = -returncode
+        signal.signal(sig, signal.SIG_DFL)
+        os.kill(os.getpid(), sig)
+    sys.exit(returncode)
+
+def append_record(path, record):
+    # A single write of a short line is atomic with O_APPEND
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+def started_ago():
+    """Returns seconds since the start of this process, with the
+    resolution of clock ticks (usually 10 ms).
+    """
+    with open('/proc/self/stat', 'r') as f:
+        stat = f.read()
+    # starttime is the 22nd field, the 20th after the command name
+    ticks = int(stat[stat.rfind(')')+2:].split()[19])
+    return time.clock_gettime(time.CLOCK_BOOTTIME) - \
+           ticks / os.sysconf('SC_CLK_TCK')
+
+def run_inner(opts):
+    """Runs ``opts.cmd`` (without shell), copies its output, and records
+    its time and size for the outer wrapper. The time includes the
+    startup of this wrapper, which would otherwise count to the next
+    stage.
+    """
+    start = time.perf_counter() - started_ago()
+    proc = subprocess.run(opts.cmd, stdout=subprocess.PIPE)
+    elapsed = time.perf_counter() - start
+    sys.stdout.buffer.write(proc.stdout)
+    sys.stdout.flush()
+    if os.environ.get(INNER_ENV):
+        append_record(os.environ[INNER_ENV],
+                      {'time' : elapsed, 'states' : hoa_states(proc.stdout)})
+    exit_as(proc.returncode)
+
+def run_stages(opts):
+    """Runs the stages ``opts.cmd`` one after another, each one reading
+    the output of the previous one. Returns the returncode of the last
+    executed stage and a list of ``{'time', 'states'}`` of the stages.
+    """
+    tmp_dir = tempfile.mkdtemp(prefix='tool_wrapper')
+    inner_file = os.path.join(tmp_dir, 'inner.jsonl')
+    env = dict(os.environ)
+    env[INNER_ENV] = inner_file
+    stages = []
+    stdin = None
+    try:
+        for i, cmd in enumerate(opts.cmd):
+            last = i == len(opts.cmd) - 1
+            out = None if last else \
+                  open(os.path.join(tmp_dir, 'stage{}'.format(i)), 'w+b')
+            start = time.perf_counter()
+            proc = subprocess.Popen(['/bin/sh', '-c', cmd], stdin=stdin,
+                                    stdout=out, env=env)
+            returncode = watch(proc, opts)
+            stage = {'time' : time.perf_counter() - start}
+            if stdin is not None:
+                stdin.close()
+            if out is not None:
+                out.seek(0)
+                stage['states'] = hoa_states(out.read())
+                out.seek(0)
+            stages.append(stage)
+            stdin = out
+            if returncode != 0:
+                break
+        if stdin is not None:
+            stdin.close()
+        inner = []
+        if os.path.isfile(inner_file):
+            with open(inner_file, 'r') as f:
+                inner = [json.loads(line) for line in f]
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if inner and len(stages) == 1:
+        # The translator called by the tool is the first stage
+        inner_time = sum(r['time'] for r in inner)
+        sizes = [r['states'] for r in inner if r['states'] is not None]
+        stages = [{'time' : inner_time,
+                   'states' : max(sizes) if sizes else None},
+                  {'time' : max(stages[0]['time'] - inner_time, 0)}]
+    return returncode, stages
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mem-limit', type=float, default=None,
+                        help='limit in MB for the process tree of CMD')
+    parser.add_argument('--total-limit', type=float, default=None,
+                        help='limit in MB for all processes under ROOT')
+    parser.add_argument('--root', type=int, default=None)
+    parser.add_argument('--interval', type=float, default=0.05,
+                        help='seconds between two measurements')
+    parser.add_argument('--stages', action='store_true',
+                        help='run each CMD as a stage of a pipeline and '
+                             'record the stages to $' + STAGES_ENV)
+    parser.add_argument('--tool', default=None,
+                        help='name of the tool for the stage records')
+    parser.add_argument('--formula', default=None,
+                        help='the translated formula for the stage records')
+    parser.add_argument('--inner', action='store_true',
+                        help='run CMD (split into arguments) for an outer '
+                             'wrapper with --stages')
+    parser.add_argument('cmd', nargs='+')
+    opts = parser.parse_args()
+    if opts.total_limit is not None and opts.root is None:
+        parser.error('--total-limit requires --root')
+
+    if opts.inner:
+        run_inner(opts)
+    if not opts.stages:
+        proc = subprocess.Popen(['/bin/sh', '-c', ' '.join(opts.cmd)])
+        exit_as(watch(proc, opts))
+
+    returncode, stages = run_stages(opts)
+    if os.environ.get(STAGES_ENV):
+        append_record(os.environ[STAGES_ENV],
+                      {'tool' : opts.tool, 'formula' : opts.formula,
+                       'exit_code' : returncode, 'stages' : stages})
+    exit_as(returncode)
+
+if __name__ == '__main__':
+    main()